@@ -4,44 +4,246 @@ Policy Generation Script
 Generates security policies for a given LLM model using the same system prompt as policy_generator.py
 """
 
+import asyncio
+import atexit
+import functools
 import json
+import logging
 import os
+import random
 import sys
+import time
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
+from types import SimpleNamespace
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    APIStatusError,
+    ConflictError,
+    InternalServerError,
+)
 from dotenv import load_dotenv
 
+# Try to import orjson (C-accelerated JSON encoder), fall back to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import tiktoken for exact prompt token counts, fall back to a heuristic
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+logger = logging.getLogger(__name__)
+
+# Matches the indented "  LEVEL: message" style of the console output
+LOG_FORMAT = "  %(levelname)s: %(message)s"
+
+# Buffer size for JSON output files (policies can be several MB)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Vulnerability fields embedded in the prompt; the rest only inflate input tokens
+PROMPT_VULN_FIELDS = ("tool", "file", "line", "package", "version", "url", "severity", "cwe", "title")
+
+# Findings sharing these fields are collapsed into one group with a location list.
+# SCA findings are located by package/version and DAST findings by url.
+GROUP_KEY_FIELDS = ("tool", "cwe", "title", "severity")
+LOCATION_FIELDS = ("file", "line", "package", "version", "url")
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Request timeout (seconds). Transient failures are retried below instead of
+# waiting indefinitely on a single stuck request.
+REQUEST_TIMEOUT = 600.0
+CONNECT_TIMEOUT = 10.0
+
+# Streamed responses are checkpointed here so an interrupted request can be recovered
+PARTIAL_OUTPUT_DIR = "partial_outputs"
+PARTIAL_FLUSH_INTERVAL = 5.0  # seconds
+
+# Retry settings for transient OpenRouter errors (408/409/429/5xx, timeouts,
+# connection drops) - the same set the SDK's own retries cover
+MAX_ATTEMPTS = 5
+RETRY_MIN_WAIT = 2.0
+RETRY_MAX_WAIT = 60.0
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, ConflictError, InternalServerError)
+# Status codes without a dedicated exception class
+RETRYABLE_STATUS_CODES = (408,)
+try:
+    import httpx
+    # A connection dropped while iterating a stream surfaces as a raw httpx error
+    RETRYABLE_ERRORS += (httpx.TransportError,)
+except ImportError:
+    pass
+
+# Sync clients are cached per API key and share one HTTP connection pool so
+# consecutive model requests reuse keep-alive TLS connections
+_shared_http_client = None
+_sync_clients = {}
+
+# Context window and maximum output tokens per model (from OpenRouter model pages).
+# max_tokens is sized from these so long prompts don't get truncated responses.
+MODEL_CONTEXT = {
+    "openai/gpt-5": 400000,
+    "openai/gpt-5-mini": 400000,
+    "openai/gpt-5-nano": 400000,
+    "openai/gpt-oss-120b": 131072,
+    "x-ai/grok-4-fast": 2000000,
+    "minimax/minimax-m2": 204800,
+    "meta-llama/llama-3.3-70b-instruct": 131072,
+    "z-ai/glm-4.6": 202752,
+    "google/gemini-2.5-flash": 1048576,
+}
+MODEL_OUTPUT_CAP = {
+    "openai/gpt-5": 128000,
+    "openai/gpt-5-mini": 128000,
+    "openai/gpt-5-nano": 128000,
+    "openai/gpt-oss-120b": 32768,
+    "x-ai/grok-4-fast": 30000,
+    "minimax/minimax-m2": 65536,
+    "meta-llama/llama-3.3-70b-instruct": 16384,
+    "z-ai/glm-4.6": 65536,
+    "google/gemini-2.5-flash": 65535,
+}
+DEFAULT_CONTEXT = 128000
+DEFAULT_OUTPUT_CAP = 16000
+MAX_TOKENS_SAFETY_MARGIN = 512
+
+# Providers that honour the OpenAI "n" parameter (several completions per request)
+MULTI_CHOICE_PROVIDERS = ("openai/", "x-ai/")
+
+# .env locations checked in order (project root first, then this directory)
+_ENV_CANDIDATES = (
+    Path(__file__).parent.parent / ".env",
+    Path(__file__).parent / ".env",
+)
+
+
+def load_env():
+    """Load the first .env file found, without overriding set variables."""
+    for env_file in _ENV_CANDIDATES:
+        if env_file.is_file():
+            load_dotenv(env_file, override=False)
+            return
+    load_dotenv(override=False)
+
+
+def dumps_compact(data):
+    """Serialize data to JSON text without insignificant whitespace, using orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def write_json_file(filepath, data):
+    """Write data as 2-space indented UTF-8 JSON with a single buffered write."""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    with open(filepath, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(payload)
+
+
+@functools.lru_cache(maxsize=None)
+def _read_json(full_path):
+    """Read and decode a JSON file once per resolved path."""
+    with open(full_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def _read_text(full_path):
+    """Read a text file once per resolved path."""
+    with open(full_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 
 def load_vulnerabilities(path="results/parsed_data/vulnerabilities.json"):
-    """Load vulnerabilities from JSON file."""
+    """Load vulnerabilities from JSON file.
+
+    The decoded data is cached and shared between callers; do not mutate it.
+    """
     script_dir = Path(__file__).parent.parent
     full_path = (script_dir / path).resolve()
-    with open(full_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return _read_json(full_path)
 
 
 def load_iso27001_annex(path="reference-policies/iso27001_templates.json"):
     """Load ISO 27001 Annex A controls."""
     script_dir = Path(__file__).parent.parent
     full_path = (script_dir / path).resolve()
-    with open(full_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return _read_text(full_path)
 
 
 def load_iso27001_annex_controls(path="docs/ISO27001-AnnexA.txt"):
     """Load ISO 27001 Annex A controls list from text file."""
     script_dir = Path(__file__).parent.parent
     full_path = (script_dir / path).resolve()
-    with open(full_path, 'r', encoding='utf-8') as f:
-        return f.read()
+    return _read_text(full_path)
+
 
+def _group_vulnerabilities(vulns):
+    """Collapse findings with the same tool, CWE, title and severity into groups.
 
-def build_system_prompt(vulnerabilities, iso_annex, iso_annex_controls_list):
-    """Build the system prompt for the LLM - same as policy_generator.py"""
+    Each group lists the affected locations and how many findings it stands for.
+    """
+    groups = defaultdict(lambda: {"count": 0, "locations": []})
+    for vuln in vulns:
+        group = groups[tuple(vuln.get(field) for field in GROUP_KEY_FIELDS)]
+        group["count"] += 1
+        location = {field: vuln[field] for field in LOCATION_FIELDS if field in vuln}
+        if location:
+            group["locations"].append(location)
+    
+    grouped = []
+    for key, group in groups.items():
+        fields = {field: value for field, value in zip(GROUP_KEY_FIELDS, key) if value is not None}
+        grouped.append({**fields, **group})
+    return grouped
+
+
+def _compact_vulns(vulnerabilities):
+    """Project the scan results onto the fields used for policy generation."""
+    vulns = [
+        {key: vuln[key] for key in PROMPT_VULN_FIELDS if key in vuln}
+        for vuln in vulnerabilities.get("vulnerabilities", [])
+    ]
+    return {
+        "metadata": vulnerabilities.get("metadata", {}),
+        "original_total": len(vulns),
+        "vulnerability_groups": _group_vulnerabilities(vulns),
+    }
+
+
+def serialize_vulnerabilities(vulnerabilities):
+    """Serialize the scan results for embedding in the system prompt.
+
+    Indentation, fields that do not influence the policies and repeated
+    findings only add input tokens, so the prompt gets a compact, grouped
+    projection of the raw data. The raw file stays the ground truth.
+    """
+    return dumps_compact(_compact_vulns(vulnerabilities))
+
+
+def build_system_prompt(vulns_json_text, iso_annex, iso_annex_controls_list):
+    """Build the system prompt for the LLM - same as policy_generator.py
+
+    vulns_json_text is the already serialized vulnerability data, so callers
+    that reuse the same scan results serialize them only once.
+    """
     
     prompt = f"""You are a security policy expert specializing in ISO 27001 compliance. Your task is to analyze vulnerability scan results and generate comprehensive security policies.
 
@@ -50,7 +252,7 @@ This is the complete list of ISO 27001:2022 Annex A controls available for refer
 {iso_annex_controls_list}
 
 **CONTEXT - Vulnerability Scan Results:**
-{json.dumps(vulnerabilities, indent=2)}
+{vulns_json_text}
 
 **YOUR TASK:**
 1. Analyze all vulnerabilities and group them by related security domains
@@ -82,41 +284,157 @@ Generate 3-10 policies covering the most critical security gaps identified in th
     return prompt
 
 
-def generate_policies(api_key, model, vulnerabilities, iso_annex, iso_annex_controls_list):
-    """Generate policies using OpenRouter API with proper timeout handling and reasoning support."""
-    
-    # Initialize OpenAI client for OpenRouter with very large timeout to wait indefinitely
-    # Use a very large timeout value (24 hours) to effectively wait indefinitely
+def is_retryable(error):
+    """Whether a failed request should be retried."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+def retry_wait(attempt):
+    """Random exponential backoff (seconds) before retrying the given attempt."""
+    wait = random.uniform(0, min(RETRY_MAX_WAIT, RETRY_MIN_WAIT * 2 ** attempt))
+    return max(RETRY_MIN_WAIT, wait)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Async concurrency limiter with AIMD (additive increase, multiplicative decrease).
+
+    Used like an asyncio.Semaphore. The number of permits is halved whenever a
+    request is rate limited and grows back by one after each successful request.
+    """
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max(1, max_concurrent)
+        self.limit = self.max_concurrent
+        self._active = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        """Additive increase: allow one more concurrent request."""
+        self.limit = min(self.max_concurrent, self.limit + 1)
+
+    def on_rate_limit(self):
+        """Multiplicative decrease: halve the number of concurrent requests."""
+        self.limit = max(1, self.limit // 2)
+        print(f"  WARNING: Rate limited - reducing concurrency to {self.limit}")
+
+
+def create_openrouter_client(api_key):
+    """Create an async OpenRouter client with a bounded timeout.
+
+    Returns a ``(client, http_client)`` tuple; ``http_client`` is None when
+    httpx is not available and must be closed by the caller otherwise.
+    Built-in client retries are disabled since retries are handled by
+    agenerate_policies_from_prompt.
+    """
     try:
         import httpx
-        # Set timeout to a very large value (24 hours in seconds = 86400)
-        # This effectively waits indefinitely for model responses
-        http_client = httpx.Client(
-            timeout=httpx.Timeout(86400.0, connect=30.0),  # 24 hours total, 30s connect
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
             limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
         )
         
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+        client = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
             api_key=api_key,
             http_client=http_client,
-            timeout=86400.0,  # 24 hours timeout
+            timeout=REQUEST_TIMEOUT,
+            max_retries=0,
         )
     except ImportError:
         # Fallback if httpx not available - create client without custom HTTP client
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+        client = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
             api_key=api_key,
-            timeout=86400.0,  # 24 hours timeout
+            timeout=REQUEST_TIMEOUT,
+            max_retries=0,
         )
         http_client = None
     
-    system_prompt = build_system_prompt(vulnerabilities, iso_annex, iso_annex_controls_list)
+    return client, http_client
+
+
+def get_openrouter_client(api_key):
+    """Return a cached sync OpenRouter client for the API key.
+
+    All cached clients share a single httpx.Client, which is closed at exit.
+    """
+    global _shared_http_client
+    
+    if api_key in _sync_clients:
+        return _sync_clients[api_key]
+    
+    if _shared_http_client is None:
+        try:
+            import httpx
+            _shared_http_client = httpx.Client(
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            )
+            atexit.register(_shared_http_client.close)
+        except ImportError:
+            _shared_http_client = False  # httpx not available, let OpenAI manage its own
+    
+    client_kwargs = {}
+    if _shared_http_client:
+        client_kwargs["http_client"] = _shared_http_client
     
-    print(f"  DEBUG: Prompt length: {len(system_prompt)} characters")
-    print(f"  DEBUG: Model: {model}")
-    print(f"  DEBUG: Timeout set to 24 hours - waiting indefinitely for model response...")
-    print(f"  DEBUG: This may take several minutes for large responses...")
+    _sync_clients[api_key] = OpenAI(
+        base_url=OPENROUTER_BASE_URL,
+        api_key=api_key,
+        timeout=REQUEST_TIMEOUT,
+        max_retries=0,
+        **client_kwargs,
+    )
+    return _sync_clients[api_key]
+
+
+@functools.lru_cache(maxsize=32)
+def count_prompt_tokens(text, model):
+    """Count prompt tokens with tiktoken for OpenAI models, ~4 chars/token otherwise."""
+    if TIKTOKEN_AVAILABLE and model.lower().startswith("openai/"):
+        try:
+            return len(tiktoken.encoding_for_model("gpt-4o").encode(text))
+        except Exception:
+            pass  # Encoding data unavailable (e.g. offline), use the heuristic
+    return len(text) // 4
+
+
+def compute_max_tokens(model, system_prompt):
+    """Size max_tokens to the room left in the model's context window."""
+    context = MODEL_CONTEXT.get(model, DEFAULT_CONTEXT)
+    output_cap = MODEL_OUTPUT_CAP.get(model, DEFAULT_OUTPUT_CAP)
+    available = context - count_prompt_tokens(system_prompt, model) - MAX_TOKENS_SAFETY_MARGIN
+    if available <= 0:
+        raise ValueError(f"Prompt does not fit in the context window of {model} ({context} tokens)")
+    return min(available, output_cap)
+
+
+def supports_multiple_choices(model):
+    """Check whether the model's provider supports n > 1 completions per request."""
+    return model.lower().startswith(MULTI_CHOICE_PROVIDERS)
+
+
+def build_completion_params(model, system_prompt, n=1):
+    """Build the chat completion request parameters for a model."""
+    max_tokens = compute_max_tokens(model, system_prompt)
+    logger.debug("Prompt length: %d characters", len(system_prompt))
+    logger.debug("Model: %s", model)
+    logger.debug("Max tokens: %d", max_tokens)
+    logger.debug("Timeout set to %.0fs per attempt (up to %d attempts)", REQUEST_TIMEOUT, MAX_ATTEMPTS)
+    logger.debug("This may take several minutes for large responses...")
     
     # Check if this is Kimi-K2-Thinking model (needs reasoning enabled)
     # Note: Kimi-K2 is no longer the reference model, but we keep reasoning support
@@ -127,85 +445,289 @@ def generate_policies(api_key, model, vulnerabilities, iso_annex, iso_annex_cont
     extra_body = {}
     if is_kimi:
         extra_body = {"reasoning": {"enabled": True}}
-        print(f"  DEBUG: Reasoning enabled for {model} (this may take longer)")
+        logger.debug("Reasoning enabled for %s (this may take longer)", model)
     
-    try:
-        # Create completion with proper OpenRouter syntax
-        completion_params = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": system_prompt
-                }
-            ],
-            "temperature": 0.7,
-            "max_tokens": 16000,  # Increased to handle longer responses
-            "extra_headers": {
-                "HTTP-Referer": "https://github.com/DouaeBakkali269/AI-DevSecOps-Project",
-                "X-Title": "ISO 27001 Policy Generator",
+    # Create completion with proper OpenRouter syntax
+    completion_params = {
+        "model": model,
+        "messages": [
+            {
+                "role": "user",
+                "content": system_prompt
             }
+        ],
+        "temperature": 0.7,
+        "max_tokens": max_tokens,
+        "extra_headers": {
+            "HTTP-Referer": "https://github.com/DouaeBakkali269/AI-DevSecOps-Project",
+            "X-Title": "ISO 27001 Policy Generator",
         }
+    }
+    
+    # Request several completions at once (one RPM slot, one prompt charge)
+    if n > 1:
+        completion_params["n"] = n
+    
+    # Add extra_body if reasoning is enabled
+    if extra_body:
+        completion_params["extra_body"] = extra_body
+        logger.debug("Sending request with reasoning enabled...")
+    else:
+        logger.debug("Sending request...")
+    
+    return completion_params
+
+
+def extract_choice_content(choice):
+    """Validate a single completion choice and return its message content."""
+    # Check for finish_reason
+    if hasattr(choice, 'finish_reason'):
+        finish_reason = choice.finish_reason
+        logger.debug("Finish reason: %s", finish_reason)
         
-        # Add extra_body if reasoning is enabled
-        if extra_body:
-            completion_params["extra_body"] = extra_body
-            print(f"  DEBUG: Sending request with reasoning enabled...")
-        else:
-            print(f"  DEBUG: Sending request...")
+        if finish_reason == 'content_filter':
+            raise ValueError("Response was blocked by content filter")
+        elif finish_reason == 'length':
+            print(f"  WARNING: Response was truncated due to token limit")
+        elif finish_reason != 'stop':
+            print(f"  WARNING: Unexpected finish_reason: {finish_reason}")
+    
+    # Check for message content
+    if hasattr(choice, 'message') and choice.message:
+        content = choice.message.content
+        
+        # Only build the content diagnostics when debug output is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response type: %s", type(content))
+            logger.debug("Content is None: %s", content is None)
+            
+            if content is not None:
+                content_length = len(content) if isinstance(content, str) else 0
+                logger.debug("Content length: %d characters", content_length)
+                if content_length > 0:
+                    logger.debug("Content preview (first 200 chars): %s...", content[:200])
+        
+        # Validate that we got content
+        if content is None:
+            raise ValueError("LLM returned None content. The response may still be processing or was filtered.")
         
-        print(f"  DEBUG: Waiting for API response (timeout: 24 hours)...")
-        completion = client.chat.completions.create(**completion_params)
-        print(f"  DEBUG: Received API response")
+        if not isinstance(content, str):
+            raise ValueError(f"LLM returned non-string content: {type(content)}")
+        
+        if not content.strip():
+            raise ValueError(f"LLM returned empty content. Content type: {type(content)}, length: {len(content)}")
+        
+        logger.debug("Successfully received %d characters of content", len(content))
+        return content
+    else:
+        raise ValueError("Response has no message content")
+
+
+class StreamCollector:
+    """Accumulate streamed completion chunks and checkpoint the partial output.
+
+    The text received so far is flushed to a partial-output file every
+    PARTIAL_FLUSH_INTERVAL seconds, so a dropped connection still leaves a
+    response that parse_policy_response can recover policies from. One
+    collector is used for all attempts of a request; the file keeps the
+    longest partial response seen, so a retry failing early never replaces it.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.partial_path = partial_output_path(model)
+        self.saved_length = 0
+        self.start_attempt()
+
+    def start_attempt(self):
+        """Discard the chunks of a failed attempt before retrying."""
+        self.parts = defaultdict(list)
+        self.finish_reasons = {}
+        self._last_flush = time.monotonic()
+
+    def add(self, chunk):
+        """Add one streamed chunk, flushing the partial output when due."""
+        for choice in chunk.choices or []:
+            if choice.delta and choice.delta.content:
+                self.parts[choice.index].append(choice.delta.content)
+            if choice.finish_reason:
+                self.finish_reasons[choice.index] = choice.finish_reason
+        
+        if time.monotonic() - self._last_flush >= PARTIAL_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write the text received so far for the first choice to the partial-output file.
+
+        Nothing is written unless the text is longer than the saved partial.
+        """
+        self._last_flush = time.monotonic()
+        text = "".join(self.parts[0])
+        if len(text) <= self.saved_length:
+            return
+        self.partial_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.partial_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.saved_length = len(text)
+
+    def contents(self):
+        """Validate every streamed choice and return their message contents."""
+        if not self.parts and not self.finish_reasons:
+            raise ValueError("Response has no choices")
+        
+        contents = []
+        for index in sorted(set(self.parts) | set(self.finish_reasons)):
+            choice = SimpleNamespace(
+                finish_reason=self.finish_reasons.get(index),
+                message=SimpleNamespace(content="".join(self.parts[index])),
+            )
+            contents.append(extract_choice_content(choice))
         
-        # Wait for the response to complete
-        if hasattr(completion, 'choices') and completion.choices:
-            choice = completion.choices[0]
+        # The full response is available, the checkpoint is no longer needed
+        if self.partial_path.exists():
+            self.partial_path.unlink()
+        return contents
+
+
+def partial_output_path(model):
+    """Path of the partial-output checkpoint file for a model."""
+    safe_model_name = model.replace("/", "_").replace("\\", "_")
+    return Path(__file__).parent / PARTIAL_OUTPUT_DIR / f"{safe_model_name}_partial.txt"
+
+
+def stream_completion(client, completion_params):
+    """Stream a chat completion, retrying transient errors with backoff.
+
+    Returns the validated message content of every choice.
+    """
+    logger.debug("Waiting for API response...")
+    collector = StreamCollector(completion_params["model"])
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        collector.start_attempt()
+        try:
+            stream = client.chat.completions.create(**completion_params, stream=True)
+            for chunk in stream:
+                collector.add(chunk)
+            break
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            collector.flush()
+            if attempt == MAX_ATTEMPTS:
+                if collector.saved_length:
+                    print(f"  INFO: Partial response saved to: {collector.partial_path}")
+                raise
+            wait = retry_wait(attempt)
+            print(f"  WARNING: {type(e).__name__} on attempt {attempt}/{MAX_ATTEMPTS}, retrying in {wait:.1f}s...")
+            time.sleep(wait)
+    logger.debug("Received API response")
+    return collector.contents()
+
+
+def generate_policies(api_key, model, vulnerabilities, iso_annex, iso_annex_controls_list):
+    """Generate policies using OpenRouter API with proper timeout handling and reasoning support."""
+    system_prompt = build_system_prompt(serialize_vulnerabilities(vulnerabilities), iso_annex, iso_annex_controls_list)
+    return generate_policies_from_prompt(api_key, model, system_prompt)
+
+
+def generate_policies_from_prompt(api_key, model, system_prompt):
+    """Generate policies from a prebuilt system prompt.
+
+    The prompt only depends on the input data, so callers generating for
+    several models should build it once with build_system_prompt.
+    """
+    client = get_openrouter_client(api_key)
+    
+    try:
+        completion_params = build_completion_params(model, system_prompt)
+        
+        return stream_completion(client, completion_params)[0]
             
-            # Check for finish_reason
-            if hasattr(choice, 'finish_reason'):
-                finish_reason = choice.finish_reason
-                print(f"  DEBUG: Finish reason: {finish_reason}")
-                
-                if finish_reason == 'content_filter':
-                    raise ValueError("Response was blocked by content filter")
-                elif finish_reason == 'length':
-                    print(f"  WARNING: Response was truncated due to token limit")
-                elif finish_reason != 'stop':
-                    print(f"  WARNING: Unexpected finish_reason: {finish_reason}")
+    except Exception as e:
+        print(f"  ERROR in generate_policies_from_prompt: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+
+def generate_policy_samples(api_key, model, system_prompt, samples):
+    """Generate several independent policy samples for one model.
+
+    Only providers supporting n > 1 (OpenAI family, xAI) get a single request
+    with n=samples; other models fall back to one request per sample.
+    """
+    if samples <= 1 or not supports_multiple_choices(model):
+        return [generate_policies_from_prompt(api_key, model, system_prompt) for _ in range(samples)]
+    
+    client = get_openrouter_client(api_key)
+    
+    try:
+        completion_params = build_completion_params(model, system_prompt, n=samples)
+        
+        return stream_completion(client, completion_params)
             
-            # Check for message content
-            if hasattr(choice, 'message') and choice.message:
-                content = choice.message.content
-                
-                print(f"  DEBUG: Response type: {type(content)}")
-                print(f"  DEBUG: Content is None: {content is None}")
-                
-                if content is not None:
-                    content_length = len(content) if isinstance(content, str) else 0
-                    print(f"  DEBUG: Content length: {content_length} characters")
-                    if content_length > 0:
-                        print(f"  DEBUG: Content preview (first 200 chars): {content[:200]}...")
-                
-                # Validate that we got content
-                if content is None:
-                    raise ValueError("LLM returned None content. The response may still be processing or was filtered.")
-                
-                if not isinstance(content, str):
-                    raise ValueError(f"LLM returned non-string content: {type(content)}")
-                
-                if not content.strip():
-                    raise ValueError(f"LLM returned empty content. Content type: {type(content)}, length: {len(content)}")
-                
-                print(f"  DEBUG: Successfully received {len(content)} characters of content")
-                return content
-            else:
-                raise ValueError("Response has no message content")
-        else:
-            raise ValueError("Response has no choices")
+    except Exception as e:
+        print(f"  ERROR in generate_policy_samples: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+
+async def astream_into(client, completion_params, collector):
+    """Stream an async chat completion into the given StreamCollector."""
+    stream = await client.chat.completions.create(**completion_params, stream=True)
+    async for chunk in stream:
+        collector.add(chunk)
+
+
+async def agenerate_policies_from_prompt(api_key, model, system_prompt, semaphore=None, client=None):
+    """Async variant of generate_policies_from_prompt.
+
+    When a semaphore is given, the API call is gated by it so that concurrent
+    requests stay within the provider's rate limits. An AdaptiveConcurrencyLimiter
+    is additionally told about successes and rate limits so it can resize itself.
+    An existing AsyncOpenAI client may be passed to reuse its connection pool;
+    it is left open for the caller to close.
+    """
+    http_client = None
+    if client is None:
+        client, http_client = create_openrouter_client(api_key)
+    
+    try:
+        completion_params = build_completion_params(model, system_prompt)
+        
+        logger.debug("Waiting for API response...")
+        collector = StreamCollector(model)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            collector.start_attempt()
+            try:
+                if semaphore is not None:
+                    async with semaphore:
+                        await astream_into(client, completion_params, collector)
+                else:
+                    await astream_into(client, completion_params, collector)
+                if hasattr(semaphore, "on_success"):
+                    semaphore.on_success()
+                break
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                collector.flush()
+                if isinstance(e, RateLimitError) and hasattr(semaphore, "on_rate_limit"):
+                    semaphore.on_rate_limit()
+                if attempt == MAX_ATTEMPTS:
+                    if collector.saved_length:
+                        print(f"  INFO: Partial response saved to: {collector.partial_path}")
+                    raise
+                wait = retry_wait(attempt)
+                print(f"  WARNING: {model}: {type(e).__name__} on attempt {attempt}/{MAX_ATTEMPTS}, retrying in {wait:.1f}s...")
+                await asyncio.sleep(wait)
+        logger.debug("Received API response for %s", model)
+        
+        return collector.contents()[0]
             
     except Exception as e:
-        print(f"  ERROR in generate_policies: {e}")
+        print(f"  ERROR in agenerate_policies_from_prompt ({model}): {e}")
         import traceback
         traceback.print_exc()
         raise
@@ -213,12 +735,12 @@ def generate_policies(api_key, model, vulnerabilities, iso_annex, iso_annex_cont
         # Clean up HTTP client if we created one
         if http_client:
             try:
-                http_client.close()
+                await http_client.aclose()
             except:
                 pass
 
 
-def parse_policy_response(response_text, model_name):
+def parse_policy_response(response_text, model_name, requested_max_tokens=None):
     """Parse LLM response and extract JSON policies with improved truncation handling."""
     # Try to extract JSON from the response
     response_text = response_text.strip()
@@ -247,6 +769,8 @@ def parse_policy_response(response_text, model_name):
             "total_policies": len(policy_data["policies"]),
             "generated_at": datetime.utcnow().isoformat() + "Z"
         }
+        if requested_max_tokens is not None:
+            policy_data["metadata"]["requested_max_tokens"] = requested_max_tokens
         
         return policy_data
     except json.JSONDecodeError as e:
@@ -339,6 +863,8 @@ def parse_policy_response(response_text, model_name):
             "policies": policies_extracted,
             "raw_response": response_text
         }
+        if requested_max_tokens is not None:
+            result["metadata"]["requested_max_tokens"] = requested_max_tokens
         
         # If we extracted some policies, report success
         if partial_data and len(policies_extracted) > 0:
@@ -347,8 +873,12 @@ def parse_policy_response(response_text, model_name):
         return result
 
 
-def save_policies(policy_data, output_dir, model_name):
-    """Save generated policies to JSON file."""
+def save_policies(policy_data, output_dir, model_name, sample_index=None):
+    """Save generated policies to JSON file.
+
+    When sample_index is given the file is tagged as ``{model}_sample{idx}.json``
+    so several samples of the same model can be kept side by side.
+    """
     script_dir = Path(__file__).parent
     full_output_dir = (script_dir / output_dir).resolve()
     
@@ -356,11 +886,13 @@ def save_policies(policy_data, output_dir, model_name):
     
     # Create safe filename from model name
     safe_model_name = model_name.replace("/", "_").replace("\\", "_")
-    filename = f"{safe_model_name}_policies.json"
+    if sample_index is None:
+        filename = f"{safe_model_name}_policies.json"
+    else:
+        filename = f"{safe_model_name}_sample{sample_index}.json"
     filepath = full_output_dir / filename
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(policy_data, f, indent=2, ensure_ascii=False)
+    write_json_file(filepath, policy_data)
     
     return str(filepath)
 
@@ -370,20 +902,9 @@ def main():
     import argparse
     
     # Load environment variables
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
-    
-    env_files = [
-        project_root / ".env",
-        script_dir / ".env",
-    ]
+    load_env()
     
-    for env_file in env_files:
-        if env_file.exists():
-            load_dotenv(env_file, override=False)
-            break
-    else:
-        load_dotenv(override=False)
+    logging.basicConfig(level=os.getenv("LOGLEVEL", "INFO"), format=LOG_FORMAT)
     
     # Get API key
     api_key = os.getenv("OPENROUTER_API_KEY")
@@ -427,8 +948,17 @@ Examples:
         default="generated_policies",
         help="Output directory for generated policies (default: generated_policies)"
     )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=1,
+        help="Number of policy samples per model (default: 1). OpenAI and xAI models "
+             "return all samples from a single request using the 'n' parameter"
+    )
     
     args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
     
     # Determine which models to process
     models_to_process = []
@@ -475,6 +1005,10 @@ Examples:
         print(f"ERROR: Failed to load input data: {e}")
         return 1
     
+    # The prompt is identical for every model, so serialize and build it once
+    vulns_json_text = serialize_vulnerabilities(vulnerabilities)
+    system_prompt = build_system_prompt(vulns_json_text, iso_annex, iso_annex_controls_list)
+    
     # Generate policies for each model
     print(f"\n{'='*60}")
     print(f"GENERATING POLICIES FOR {len(models_to_process)} MODEL(S)")
@@ -487,25 +1021,34 @@ Examples:
         print(f"{'='*60}")
         
         try:
-            response_text = generate_policies(
+            response_texts = generate_policy_samples(
                 api_key,
                 model_name,
-                vulnerabilities,
-                iso_annex,
-                iso_annex_controls_list
+                system_prompt,
+                args.samples
             )
             
-            policy_data = parse_policy_response(response_text, model_name)
-            
-            filepath = save_policies(policy_data, args.output_dir, model_name)
-            print(f"[OK] Policies saved to: {filepath}")
-            print(f"  Total policies: {policy_data['metadata'].get('total_policies', 0)}")
+            policies_count = 0
+            filepaths = []
+            for idx, response_text in enumerate(response_texts, 1):
+                policy_data = parse_policy_response(
+                    response_text,
+                    model_name,
+                    requested_max_tokens=compute_max_tokens(model_name, system_prompt)
+                )
+                
+                sample_index = idx if args.samples > 1 else None
+                filepath = save_policies(policy_data, args.output_dir, model_name, sample_index=sample_index)
+                filepaths.append(filepath)
+                print(f"[OK] Policies saved to: {filepath}")
+                print(f"  Total policies: {policy_data['metadata'].get('total_policies', 0)}")
+                policies_count += policy_data['metadata'].get('total_policies', 0)
             
             results.append({
                 "model": model_name,
                 "status": "success",
-                "filepath": filepath,
-                "policies_count": policy_data['metadata'].get('total_policies', 0)
+                "filepaths": filepaths,
+                "policies_count": policies_count
             })
             
         except Exception as e:
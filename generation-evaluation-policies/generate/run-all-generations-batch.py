@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Run Policy Generation through the OpenAI Batch API
+Submits the reference model and the OpenAI-hosted evaluation models as a single
+batch job (50% token cost, no synchronous rate limits), waits for it to finish
+and saves one policy file per model.
+
+OpenRouter does not expose a batch endpoint, so this script talks to OpenAI
+directly and needs OPENAI_API_KEY. Models not listed in BATCH_MODELS still
+have to be generated with run-all-generations.py.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from openai import OpenAI
+
+# Import the generation helpers and model lists
+# Use importlib to handle the hyphenated filenames
+import importlib.util
+spec = importlib.util.spec_from_file_location("run_all_generations", Path(__file__).parent / "run-all-generations.py")
+run_all_generations = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_all_generations)
+
+from generate_policies_module import (
+    LOG_FORMAT,
+    load_env,
+    load_vulnerabilities,
+    load_iso27001_annex,
+    load_iso27001_annex_controls,
+    build_system_prompt,
+    serialize_vulnerabilities,
+    compute_max_tokens,
+)
+
+REFERENCE_MODEL = run_all_generations.REFERENCE_MODEL
+EVALUATION_MODELS = run_all_generations.EVALUATION_MODELS
+OUTPUT_DIR = run_all_generations.OUTPUT_DIR
+
+# OpenRouter model name -> OpenAI model name for models available in the Batch API
+BATCH_MODELS = {
+    "openai/gpt-5": "gpt-5",
+    "openai/gpt-5-mini": "gpt-5-mini",
+    "openai/gpt-5-nano": "gpt-5-nano",
+}
+
+BATCH_INPUT_FILE = "generation_batch_input.jsonl"
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+POLL_INTERVAL = 60  # seconds between batch status checks
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def build_batch_request(model_name, system_prompt):
+    """Build one JSONL batch request line for a model."""
+    return {
+        "custom_id": model_name,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": BATCH_MODELS[model_name],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": system_prompt
+                }
+            ],
+            # GPT-5 family models only accept max_completion_tokens and the default temperature
+            "max_completion_tokens": compute_max_tokens(model_name, system_prompt),
+        }
+    }
+
+
+def write_batch_input(models, system_prompt):
+    """Write the batch input JSONL file and return its path."""
+    input_file = Path(__file__).parent / BATCH_INPUT_FILE
+    with open(input_file, 'w', encoding='utf-8') as f:
+        for model_name in models:
+            f.write(json.dumps(build_batch_request(model_name, system_prompt), ensure_ascii=False) + "\n")
+    return input_file
+
+
+def submit_batch(client, input_file):
+    """Upload the batch input file and create the batch job."""
+    with open(input_file, 'rb') as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW,
+    )
+    return batch
+
+
+def wait_for_batch(client, batch_id, poll_interval=POLL_INTERVAL):
+    """Poll the batch until it reaches a final status."""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts:
+            print(f"  Status: {batch.status} ({counts.completed}/{counts.total} completed, {counts.failed} failed)")
+        else:
+            print(f"  Status: {batch.status}")
+
+        if batch.status in FINAL_STATUSES:
+            return batch
+
+        time.sleep(poll_interval)
+
+
+def read_batch_file(client, file_id):
+    """Download a batch output/error file and return its parsed JSONL lines."""
+    content = client.files.content(file_id).text
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def save_batch_results(client, batch, progress):
+    """Split the batch output by custom_id and save one policy file per model."""
+    results = []
+
+    if batch.output_file_id:
+        # The requested token limits are read back from the batch input so
+        # they are also known when resuming with --batch-id
+        requested_max_tokens = {
+            line["custom_id"]: line["body"].get("max_completion_tokens")
+            for line in read_batch_file(client, batch.input_file_id)
+        }
+
+        for line in read_batch_file(client, batch.output_file_id):
+            model_name = line["custom_id"]
+            response = line.get("response") or {}
+
+            if line.get("error") or response.get("status_code") != 200:
+                error = line.get("error") or response.get("body", {}).get("error")
+                print(f"  ERROR: Batch request failed for {model_name}: {error}")
+                results.append({"model": model_name, "status": "failed", "error": str(error)})
+                continue
+
+            content = response["body"]["choices"][0]["message"]["content"]
+            if not content or not content.strip():
+                print(f"  ERROR: Empty response for {model_name}")
+                results.append({"model": model_name, "status": "failed", "error": "empty response"})
+                continue
+
+            print(f"\n{'='*60}")
+            print(f"Saving policies for: {model_name}")
+            print(f"{'='*60}")
+            results.append(run_all_generations.save_policy_response(
+                content,
+                model_name,
+                OUTPUT_DIR,
+                requested_max_tokens=requested_max_tokens.get(model_name)
+            ))
+
+    if batch.error_file_id:
+        for line in read_batch_file(client, batch.error_file_id):
+            error = (line.get("response") or {}).get("body", {}).get("error") or line.get("error")
+            print(f"  ERROR: Batch request failed for {line['custom_id']}: {error}")
+            results.append({"model": line["custom_id"], "status": "failed", "error": str(error)})
+
+    # Record results in the shared generation progress log
+    for result in results:
+        run_all_generations.record_result(progress, result, is_reference=result["model"] == REFERENCE_MODEL)
+
+    run_all_generations.close_progress_log()
+    return results
+
+
+def main():
+    """Main function to run the batch policy generation."""
+    # Load environment variables
+    load_env()
+
+    logging.basicConfig(level=os.getenv("LOGLEVEL", "INFO"), format=LOG_FORMAT)
+
+    parser = argparse.ArgumentParser(description="Generate policies for OpenAI models through the Batch API")
+    parser.add_argument(
+        "--batch-id",
+        help="Resume waiting for an already submitted batch instead of submitting a new one"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=POLL_INTERVAL,
+        help=f"Seconds between batch status checks (default: {POLL_INTERVAL})"
+    )
+    args = parser.parse_args()
+
+    # Get API key
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("ERROR: OPENAI_API_KEY not found in environment")
+        print("  The Batch API is not available through OpenRouter; an OpenAI key is required")
+        return 1
+
+    client = OpenAI(api_key=api_key)
+    # client.batches only exists from openai 1.18.0 on
+    if not hasattr(client, "batches"):
+        print("ERROR: The installed openai package has no Batch API support")
+        print("  Upgrade it with: pip install -r requirements.txt")
+        return 1
+    progress = run_all_generations.load_progress()
+
+    print(f"\n{'='*60}")
+    print("BATCH POLICY GENERATION RUNNER")
+    print(f"{'='*60}")
+
+    batch_id = args.batch_id
+    if not batch_id:
+        completed_models = set(progress.get("completed_models", []))
+        if progress.get("reference_generated", False):
+            completed_models.add(REFERENCE_MODEL)
+
+        models_to_run = [
+            model for model in [REFERENCE_MODEL] + EVALUATION_MODELS
+            if model in BATCH_MODELS and model not in completed_models
+        ]
+
+        if not models_to_run:
+            print("\n✓ All batch-capable models have already been processed")
+            return 0
+
+        # Load input data
+        print("\nLoading input data...")
+        try:
+            vulnerabilities = load_vulnerabilities()
+            print(f"✓ Loaded {vulnerabilities['metadata']['total_vulnerabilities']} vulnerabilities")
+
+            iso_annex = load_iso27001_annex()
+            print("✓ Loaded ISO 27001 Annex A templates")
+
+            iso_annex_controls_list = load_iso27001_annex_controls()
+            print("✓ Loaded ISO 27001 Annex A controls list")
+        except Exception as e:
+            print(f"ERROR: Failed to load input data: {e}")
+            return 1
+
+        vulns_json_text = serialize_vulnerabilities(vulnerabilities)
+        system_prompt = build_system_prompt(vulns_json_text, iso_annex, iso_annex_controls_list)
+
+        print(f"\nModels in batch: {len(models_to_run)}")
+        for model_name in models_to_run:
+            print(f"  - {model_name}")
+
+        input_file = write_batch_input(models_to_run, system_prompt)
+        batch = submit_batch(client, input_file)
+        batch_id = batch.id
+        print(f"\n✓ Batch submitted: {batch_id}")
+        print(f"  Resume later with: python run-all-generations-batch.py --batch-id {batch_id}")
+
+    print(f"\nWaiting for batch {batch_id} (polling every {args.poll_interval}s)...")
+    batch = wait_for_batch(client, batch_id, args.poll_interval)
+
+    if batch.status != "completed":
+        print(f"\n✗ Batch ended with status: {batch.status}")
+        if batch.error_file_id:
+            save_batch_results(client, batch, progress)
+        return 1
+
+    results = save_batch_results(client, batch, progress)
+
+    # Print summary
+    print(f"\n{'='*60}")
+    print("BATCH GENERATION SUMMARY")
+    print(f"{'='*60}")
+    print(f"  Successfully generated: {len([r for r in results if r['status'] == 'success'])}")
+    print(f"  Failed: {len([r for r in results if r['status'] == 'failed'])}")
+    print(f"\n✓ Progress saved to: {Path(__file__).parent / run_all_generations.PROGRESS_FILE}")
+
+    return 0 if all(r["status"] == "success" for r in results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
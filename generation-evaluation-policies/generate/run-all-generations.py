@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 """
 Run Policy Generation for Reference Model and All Evaluation Models
-Generates policies using openai/gpt-5 as reference, then all other models.
+Generates policies using openai/gpt-5 as reference and all other models concurrently.
 """
 
+import asyncio
+import atexit
+import itertools
 import json
+import logging
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Import the generation function
 # Use importlib to handle the hyphenated filename
@@ -16,12 +19,22 @@ import importlib.util
 spec = importlib.util.spec_from_file_location("generate_policies", Path(__file__).parent / "generate-policies.py")
 generate_policies_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(generate_policies_module)
+sys.modules["generate_policies_module"] = generate_policies_module
 
 from generate_policies_module import (
+    LOG_FORMAT,
+    load_env,
+    dumps_compact,
     load_vulnerabilities,
     load_iso27001_annex,
     load_iso27001_annex_controls,
-    generate_policies,
+    build_system_prompt,
+    serialize_vulnerabilities,
+    compute_max_tokens,
+    create_openrouter_client,
+    agenerate_policies_from_prompt,
+    write_json_file,
+    AdaptiveConcurrencyLimiter,
     parse_policy_response,
     save_policies
 )
@@ -43,16 +56,25 @@ EVALUATION_MODELS = [
 # Reference model: openai/gpt-5
 REFERENCE_MODEL = "openai/gpt-5"
 
-PROGRESS_FILE = "generation_progress.json"
+# Maximum number of concurrent OpenRouter requests per API key (OpenRouter default is ~60 RPM)
+DEFAULT_MAX_CONCURRENT = 6
+
+# Append-only progress log: one JSON event per line, replayed on load
+PROGRESS_FILE = "generation_progress.jsonl"
+# Legacy whole-file checkpoint, used as the starting state when present
+LEGACY_PROGRESS_FILE = "generation_progress.json"
+PROGRESS_BUFFER_SIZE = 1 << 16
+# Flush the log every N events; each event stands for minutes of LLM work
+PROGRESS_FLUSH_EVERY = 1
 OUTPUT_DIR = "c:/Users/Asus/Desktop/AI-DevSecOps-Project/generation-evaluation-policies/generated_policies"
 
 
-def load_progress():
-    """Load progress from checkpoint file."""
-    progress_file = Path(__file__).parent / PROGRESS_FILE
-    if progress_file.exists():
-        with open(progress_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+_progress_log = None
+_unflushed_events = 0
+
+
+def empty_progress():
+    """Return the initial progress state."""
     return {
         "reference_generated": False,
         "reference_file": None,
@@ -61,53 +83,132 @@ def load_progress():
     }
 
 
-def save_progress(progress):
-    """Save progress to checkpoint file."""
-    progress_file = Path(__file__).parent / PROGRESS_FILE
-    with open(progress_file, 'w', encoding='utf-8') as f:
-        json.dump(progress, f, indent=2, ensure_ascii=False)
+def apply_event(progress, event):
+    """Apply a single progress event to the in-memory progress state."""
+    kind = event.get("event")
+    if kind == "reference_generated":
+        progress["reference_generated"] = True
+        progress["reference_file"] = event["filepath"]
+        progress["reference_model"] = event["model"]
+    elif kind == "completed":
+        if event["model"] not in progress["completed_models"]:
+            progress["completed_models"].append(event["model"])
+    elif kind == "failed":
+        progress["failed_models"].append(event["result"])
+
+
+def load_progress():
+    """Load progress by replaying the append-only progress log."""
+    script_dir = Path(__file__).parent
+    progress = empty_progress()
+    
+    legacy_file = script_dir / LEGACY_PROGRESS_FILE
+    if legacy_file.exists():
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            progress.update(json.load(f))
+    
+    progress_file = script_dir / PROGRESS_FILE
+    if progress_file.exists():
+        with open(progress_file, 'rb') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Partial last line from an interrupted write
+                    break
+                apply_event(progress, event)
+    
+    return progress
+
+
+def append_event(event):
+    """Append a progress event to the progress log."""
+    global _progress_log, _unflushed_events
+    
+    if _progress_log is None:
+        _progress_log = open(Path(__file__).parent / PROGRESS_FILE, 'ab', buffering=PROGRESS_BUFFER_SIZE)
+        atexit.register(close_progress_log)
+    
+    _progress_log.write(dumps_compact(event).encode("utf-8") + b"\n")
+    
+    _unflushed_events += 1
+    if _unflushed_events >= PROGRESS_FLUSH_EVERY:
+        _progress_log.flush()
+        _unflushed_events = 0
+
+
+def close_progress_log():
+    """Flush and close the progress log."""
+    global _progress_log, _unflushed_events
+    if _progress_log is not None:
+        _progress_log.close()
+        _progress_log = None
+        _unflushed_events = 0
+
+
+def record_result(progress, result, is_reference=False):
+    """Record a model result in the progress state and append it to the progress log."""
+    if result["status"] != "success":
+        event = {"event": "failed", "model": result["model"], "result": result}
+    elif is_reference:
+        event = {"event": "reference_generated", "model": result["model"], "filepath": result["filepath"]}
+    else:
+        event = {"event": "completed", "model": result["model"]}
+    
+    apply_event(progress, event)
+    append_event(event)
+
+
+def save_policy_response(response_text, model_name, output_dir, requested_max_tokens=None):
+    """Parse an LLM response, save the policies and return the result record."""
+    # Parse response
+    policy_data = parse_policy_response(response_text, model_name, requested_max_tokens=requested_max_tokens)
+    
+    # Check for parse errors
+    if "parse_error" in policy_data.get("metadata", {}):
+        parse_error = policy_data["metadata"]["parse_error"]
+        is_truncated = policy_data.get("metadata", {}).get("is_truncated", False)
+        if is_truncated:
+            print(f"  WARNING: Response was truncated. Error: {parse_error[:100]}...")
+            print(f"  INFO: Extracted {len(policy_data.get('policies', []))} policies from truncated response")
+        else:
+            print(f"  WARNING: Parse error occurred: {parse_error[:100]}...")
+    
+    # Save policies
+    filepath = save_policies(policy_data, output_dir, model_name)
+    print(f"✓ Policies saved to: {filepath}")
+    print(f"  Total policies: {policy_data['metadata'].get('total_policies', 0)}")
+    
+    return {
+        "model": model_name,
+        "filepath": filepath,
+        "status": "success",
+        "policies_count": policy_data['metadata'].get('total_policies', 0)
+    }
 
 
-def generate_single_policy(api_key, model_name, vulnerabilities, iso_annex, iso_annex_controls_list, output_dir):
-    """Generate policies for a single model with error handling."""
+async def agenerate_single_policy(api_key, model_name, system_prompt, output_dir, semaphore=None, client=None):
+    """Generate policies for a single model with error handling, gated by the given semaphore."""
     print(f"\n{'='*60}")
     print(f"Generating policies for: {model_name}")
     print(f"{'='*60}")
     
     try:
         # Generate policies
-        response_text = generate_policies(
+        response_text = await agenerate_policies_from_prompt(
             api_key,
             model_name,
-            vulnerabilities,
-            iso_annex,
-            iso_annex_controls_list
+            system_prompt,
+            semaphore=semaphore,
+            client=client
         )
         
-        # Parse response
-        policy_data = parse_policy_response(response_text, model_name)
-        
-        # Check for parse errors
-        if "parse_error" in policy_data.get("metadata", {}):
-            parse_error = policy_data["metadata"]["parse_error"]
-            is_truncated = policy_data.get("metadata", {}).get("is_truncated", False)
-            if is_truncated:
-                print(f"  WARNING: Response was truncated. Error: {parse_error[:100]}...")
-                print(f"  INFO: Extracted {len(policy_data.get('policies', []))} policies from truncated response")
-            else:
-                print(f"  WARNING: Parse error occurred: {parse_error[:100]}...")
-        
-        # Save policies
-        filepath = save_policies(policy_data, output_dir, model_name)
-        print(f"✓ Policies saved to: {filepath}")
-        print(f"  Total policies: {policy_data['metadata'].get('total_policies', 0)}")
-        
-        return {
-            "model": model_name,
-            "filepath": filepath,
-            "status": "success",
-            "policies_count": policy_data['metadata'].get('total_policies', 0)
-        }
+        return save_policy_response(
+            response_text,
+            model_name,
+            output_dir,
+            requested_max_tokens=compute_max_tokens(model_name, system_prompt)
+        )
         
     except Exception as e:
         print(f"  ERROR: Failed to generate policies for {model_name}: {e}")
@@ -120,29 +221,67 @@ def generate_single_policy(api_key, model_name, vulnerabilities, iso_annex, iso_
         }
 
 
+def parse_api_keys(value):
+    """Parse a comma-separated list of API keys, dropping blanks."""
+    return [key.strip() for key in (value or "").split(",") if key.strip()]
+
+
+async def run_models_concurrently(api_keys, models, system_prompt, output_dir, progress, max_concurrent):
+    """Generate policies for several models concurrently, bounded by per-key semaphores.
+
+    models is a list of (model_name, tag) tuples where tag is "reference" for
+    the reference model and "eval" for evaluation models.
+
+    Requests are spread round-robin over the given API keys, with one client
+    (and connection pool) and one AIMD limiter per key: each key gets up to
+    max_concurrent requests, and a rate limit on one key only halves that
+    key's permits. Progress is checkpointed as soon as each model finishes so
+    an interrupted run can resume without repeating completed models.
+    """
+    limiters = {key: AdaptiveConcurrencyLimiter(max_concurrent) for key in api_keys}
+    clients = {key: create_openrouter_client(key) for key in api_keys}
+    # No lock needed: keys are drawn from the event loop thread only
+    key_cycle = itertools.cycle(api_keys)
+    
+    async def run_one(i, model_name, tag):
+        print(f"\n[{i}/{len(models)}] Processing: {model_name}")
+        api_key = next(key_cycle)
+        client, _ = clients[api_key]
+        result = await agenerate_single_policy(
+            api_key,
+            model_name,
+            system_prompt,
+            output_dir,
+            semaphore=limiters[api_key],
+            client=client
+        )
+        
+        # Save progress after each model
+        record_result(progress, result, is_reference=tag == "reference")
+        return result
+    
+    try:
+        return await asyncio.gather(*(
+            run_one(i, model_name, tag) for i, (model_name, tag) in enumerate(models, 1)
+        ))
+    finally:
+        for client, _ in clients.values():
+            await client.close()
+
+
 def main():
     """Main function to run all policy generations."""
     # Load environment variables
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
+    load_env()
     
-    env_files = [
-        project_root / ".env",
-        script_dir / ".env",
-    ]
-    
-    for env_file in env_files:
-        if env_file.exists():
-            load_dotenv(env_file, override=False)
-            break
-    else:
-        load_dotenv(override=False)
+    logging.basicConfig(level=os.getenv("LOGLEVEL", "INFO"), format=LOG_FORMAT)
     
-    # Get API key
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
+    # Get API key(s). OPENROUTER_API_KEYS (comma-separated) spreads requests
+    # over several keys to multiply the available rate limit.
+    api_keys = parse_api_keys(os.getenv("OPENROUTER_API_KEYS") or os.getenv("OPENROUTER_API_KEY"))
+    if not api_keys:
         print("ERROR: OPENROUTER_API_KEY not found in environment")
-        print("  Please set OPENROUTER_API_KEY in .env file or environment")
+        print("  Please set OPENROUTER_API_KEY (or OPENROUTER_API_KEYS) in .env file or environment")
         return 1
     
     # Load progress
@@ -167,46 +306,24 @@ def main():
         print(f"ERROR: Failed to load input data: {e}")
         return 1
     
-    # Generate reference policies first
+    # The prompt is identical for every model, so build it once
+    vulns_json_text = serialize_vulnerabilities(vulnerabilities)
+    system_prompt = build_system_prompt(vulns_json_text, iso_annex, iso_annex_controls_list)
+    
+    # Reference and evaluation models are independent requests, so they are
+    # all dispatched together instead of gating evaluation on the reference
+    models_to_run = []
     if not progress.get("reference_generated", False):
-        print(f"\n{'='*60}")
-        print("GENERATING REFERENCE POLICIES")
-        print(f"{'='*60}")
-        print(f"Reference model: {REFERENCE_MODEL}")
-        
-        result = generate_single_policy(
-            api_key,
-            REFERENCE_MODEL,
-            vulnerabilities,
-            iso_annex,
-            iso_annex_controls_list,
-            OUTPUT_DIR
-        )
-        
-        if result["status"] == "success":
-            progress["reference_generated"] = True
-            progress["reference_file"] = result["filepath"]
-            progress["reference_model"] = REFERENCE_MODEL
-            save_progress(progress)
-            print(f"\n✓ Reference policies generated successfully")
-        else:
-            print(f"\n✗ Failed to generate reference policies")
-            progress["failed_models"].append(result)
-            save_progress(progress)
-            return 1
+        print(f"\nReference model: {REFERENCE_MODEL} (pending)")
+        models_to_run.append((REFERENCE_MODEL, "reference"))
     else:
         print(f"\n✓ Reference policies already generated: {progress.get('reference_file')}")
     
-    # Generate policies for all evaluation models
-    print(f"\n{'='*60}")
-    print("GENERATING POLICIES FOR EVALUATION MODELS")
-    print(f"{'='*60}")
-    
     completed_models = set(progress.get("completed_models", []))
     failed_models = {m["model"] for m in progress.get("failed_models", [])}
     
-    models_to_run = [
-        model for model in EVALUATION_MODELS
+    models_to_run += [
+        (model, "eval") for model in EVALUATION_MODELS
         if model not in completed_models and model not in failed_models
     ]
     
@@ -216,31 +333,30 @@ def main():
         print(f"  Failed: {len(failed_models)} models")
         return 0
     
+    print(f"\n{'='*60}")
+    print("GENERATING POLICIES")
+    print(f"{'='*60}")
     print(f"\nModels to process: {len(models_to_run)}")
     print(f"Models already completed: {len(completed_models)}")
     
-    results = []
-    for i, model_name in enumerate(models_to_run, 1):
-        print(f"\n[{i}/{len(models_to_run)}] Processing: {model_name}")
-        
-        result = generate_single_policy(
-            api_key,
-            model_name,
-            vulnerabilities,
-            iso_annex,
-            iso_annex_controls_list,
-            OUTPUT_DIR
-        )
-        
-        results.append(result)
-        
-        # Save progress after each model
-        if result["status"] == "success":
-            progress["completed_models"].append(model_name)
-        else:
-            progress["failed_models"].append(result)
-        
-        save_progress(progress)
+    max_concurrent = int(os.getenv("OPENROUTER_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT))
+    print(f"Max concurrent requests: {max_concurrent} per key")
+    print(f"API keys in rotation: {len(api_keys)}")
+    
+    all_results = asyncio.run(run_models_concurrently(
+        api_keys,
+        models_to_run,
+        system_prompt,
+        OUTPUT_DIR,
+        progress,
+        max_concurrent
+    ))
+    
+    # Separate evaluation results from the reference result
+    results = [
+        result for (_, tag), result in zip(models_to_run, all_results)
+        if tag == "eval"
+    ]
     
     # Print summary
     print(f"\n{'='*60}")
@@ -263,12 +379,17 @@ def main():
     }
     
     summary_file = Path(__file__).parent / "generation_summary.json"
-    with open(summary_file, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    write_json_file(summary_file, summary)
+    close_progress_log()
     
     print(f"\n✓ Summary saved to: {summary_file}")
     print(f"✓ Progress saved to: {Path(__file__).parent / PROGRESS_FILE}")
     
+    # The reference is still required; evaluation results are kept either way
+    if not progress.get("reference_generated", False):
+        print(f"\n✗ Failed to generate reference policies")
+        return 1
+    
     return 0
 
 
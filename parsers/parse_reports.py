@@ -5,17 +5,117 @@ Converts SAST, SCA, and DAST reports into unified JSON format
 """
 
 import json
+import os
+import re
 import xml.etree.ElementTree as ET
-import xmltodict
 import argparse
+import functools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
+# Try to import orjson (C-accelerated JSON codec), fall back to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import ijson (streaming JSON parser), fall back to loading whole files
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Try to import lxml (libxml2-backed iterparse), fall back to ElementTree
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 
+def load_json(file_path: Path):
+    """Load a whole JSON report, using orjson when available."""
+    with open(file_path, 'rb') as f:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(f.read())
+        return json.load(f)
+
+
+def _select_items(node, parts):
+    """Yield the values of a decoded document matching an ijson-style prefix."""
+    if not parts:
+        yield node
+        return
+    head, rest = parts[0], parts[1:]
+    if head == "item":
+        if isinstance(node, list):
+            for child in node:
+                yield from _select_items(child, rest)
+    elif isinstance(node, dict) and head in node:
+        yield from _select_items(node[head], rest)
+
+
+def iter_json_items(file_path: Path, prefix: str):
+    """Yield the items under prefix (e.g. "results.item") of a JSON report.
+
+    With ijson installed the file is streamed, so only one item is held in
+    memory at a time; otherwise the whole document is loaded first.
+    """
+    if not IJSON_AVAILABLE:
+        yield from _select_items(load_json(file_path), prefix.split(".") if prefix else [])
+        return
+    with open(file_path, 'rb') as f:
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def iter_xml_elements(file_path: Path, tag: str, context_tag: Optional[str] = None):
+    """Yield (context, element) for each <tag> element of an XML report.
+
+    context holds the attributes of the enclosing <context_tag> element (an
+    empty dict without one). Each element is freed once processed, so only
+    one <tag> subtree is held in memory at a time.
+    """
+    if LXML_AVAILABLE:
+        tags = (tag, context_tag) if context_tag else tag
+        events = lxml_etree.iterparse(str(file_path), events=("start", "end"), tag=tags)
+    else:
+        events = ET.iterparse(file_path, events=("start", "end"))
+    
+    context = {}
+    for event, elem in events:
+        if event == "start":
+            if elem.tag == context_tag:
+                context = dict(elem.attrib)
+        elif elem.tag == tag:
+            yield context, elem
+            elem.clear()
+            if LXML_AVAILABLE:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        elif elem.tag == context_tag:
+            elem.clear()
+
+
+def json_root_is_list(file_path: Path) -> bool:
+    """Check whether a JSON file holds a top-level array without parsing it."""
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(64)
+            if not chunk:
+                return False
+            stripped = chunk.lstrip(b" \t\r\n\xef\xbb\xbf")
+            if stripped:
+                return stripped[:1] == b"["
+
+
 class VulnerabilityParser:
     """Parse security scan reports from multiple tools"""
     
@@ -40,87 +140,141 @@ class VulnerabilityParser:
         "INFO": 1
     }
     
-    def __init__(self, input_dir: Path, output_file: Path):
+    # Keywords are checked in this order; the first one found in the title wins
+    OWASP_MAPPING = {
+        "sql": "A03:2021 - Injection",
+        "injection": "A03:2021 - Injection",
+        "xss": "A03:2021 - Injection",
+        "authentication": "A07:2021 - Identification and Authentication Failures",
+        "session": "A07:2021 - Identification and Authentication Failures",
+        "access": "A01:2021 - Broken Access Control",
+        "authorization": "A01:2021 - Broken Access Control",
+        "crypto": "A02:2021 - Cryptographic Failures",
+        "sensitive": "A02:2021 - Cryptographic Failures",
+        "xxe": "A05:2021 - Security Misconfiguration",
+        "deserialization": "A08:2021 - Software and Data Integrity Failures",
+        "component": "A06:2021 - Vulnerable and Outdated Components",
+        "logging": "A09:2021 - Security Logging and Monitoring Failures",
+        "ssrf": "A10:2021 - Server-Side Request Forgery"
+    }
+    
+    # Patterns compiled once at class load instead of per finding
+    _CWE_TAG_RE = re.compile(r'cwe-?(\d+)', re.IGNORECASE)
+    _CWE_ID_RE = re.compile(r'CWE-(\d+)', re.IGNORECASE)
+    _OWASP_RE = re.compile("|".join(map(re.escape, OWASP_MAPPING)))
+    _OWASP_PRIORITY = {keyword: rank for rank, keyword in enumerate(OWASP_MAPPING)}
+    
+    # Fields identifying a finding; repeats of the same fingerprint are dropped.
+    # severity and the tool's own id keep separate advisories for one package
+    # apart; package/version/url/site/project do the same for SCA and DAST.
+    FINGERPRINT_FIELDS = (
+        "tool", "id", "file", "line", "cwe", "title", "severity",
+        "package", "version", "url", "site", "project"
+    )
+    
+    def __init__(self, input_dir: Path, output_file: Optional[Path] = None):
         self.input_dir = Path(input_dir)
-        self.output_file = Path(output_file)
+        self.output_file = Path(output_file) if output_file is not None else None
         self.vulnerabilities = []
+        self._seen = set()
+        
+    def _add_vulnerability(self, vuln: Dict[str, Any]) -> bool:
+        """Append a finding unless an identical one was already recorded"""
+        fingerprint = tuple(str(vuln.get(field, "")) for field in self.FINGERPRINT_FIELDS)
+        if fingerprint in self._seen:
+            return False
+        self._seen.add(fingerprint)
+        self.vulnerabilities.append(vuln)
+        return True
         
     def parse_all(self):
         """Parse all reports in input directory"""
         logger.info(f"Parsing reports from {self.input_dir}")
         
+        jobs = []
         for report_file in self.input_dir.glob("*"):
-            try:
-                if "codeql" in report_file.name and report_file.suffix == ".sarif":
-                    self._parse_codeql_sarif(report_file)
-                elif "semgrep" in report_file.name:
-                    self._parse_semgrep(report_file)
-                elif "nodejsscan" in report_file.name:
-                    self._parse_nodejsscan(report_file)
-                elif "bandit" in report_file.name:
-                    self._parse_bandit(report_file)
-                elif "npm_audit" in report_file.name:
-                    self._parse_npm_audit(report_file)
-                elif "snyk" in report_file.name:
-                    self._parse_snyk(report_file)
-                elif "zap" in report_file.name:
-                    if report_file.suffix == ".json":
-                        self._parse_zap_json(report_file)
-                    elif report_file.suffix == ".xml":
-                        self._parse_zap_xml(report_file)
-                        
-            except Exception as e:
-                logger.error(f"Error parsing {report_file.name}: {e}")
+            method_name = self._parser_for(report_file)
+            if method_name:
+                jobs.append((method_name, report_file))
+        
+        # Report files are independent, so decode them in separate processes
+        if len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                for vulns in executor.map(_parse_one, jobs):
+                    for vuln in vulns:
+                        self._add_vulnerability(vuln)
+        else:
+            for job in jobs:
+                for vuln in _parse_one(job):
+                    self._add_vulnerability(vuln)
                 
         logger.info(f"Total vulnerabilities found: {len(self.vulnerabilities)}")
         
+    @staticmethod
+    def _parser_for(report_file: Path) -> Optional[str]:
+        """Return the name of the parser method for a report file, if any"""
+        if "codeql" in report_file.name and report_file.suffix == ".sarif":
+            return "_parse_codeql_sarif"
+        elif "semgrep" in report_file.name:
+            return "_parse_semgrep"
+        elif "nodejsscan" in report_file.name:
+            return "_parse_nodejsscan"
+        elif "bandit" in report_file.name:
+            return "_parse_bandit"
+        elif "npm_audit" in report_file.name:
+            return "_parse_npm_audit"
+        elif "snyk" in report_file.name:
+            return "_parse_snyk"
+        elif "zap" in report_file.name:
+            if report_file.suffix == ".json":
+                return "_parse_zap_json"
+            elif report_file.suffix == ".xml":
+                return "_parse_zap_xml"
+        return None
+        
     def _parse_codeql_sarif(self, file_path: Path):
         """Parse CodeQL SARIF report"""
+        added = 0
         try:
-            with open(file_path, encoding='utf-8') as f:
-                data = json.load(f)
-            
-            for run in data.get("runs", []):
-                tool_name = run.get("tool", {}).get("driver", {}).get("name", "CodeQL")
+            for result in iter_json_items(file_path, "runs.item.results.item"):
+                # Extract location information
+                locations = result.get("locations")
+                if not locations:
+                    continue
+                
+                location = locations[0].get("physicalLocation") or {}
+                artifact_location = location.get("artifactLocation") or {}
+                region = location.get("region") or {}
+                
+                # Extract rule information
+                rule_id = result.get("ruleId", "Unknown")
+                message = (result.get("message") or {}).get("text", "")
+                level = result.get("level", "warning")
                 
-                for result in run.get("results", []):
-                    # Extract location information
-                    locations = result.get("locations", [])
-                    if not locations:
-                        continue
-                    
-                    location = locations[0].get("physicalLocation", {})
-                    artifact_location = location.get("artifactLocation", {})
-                    region = location.get("region", {})
-                    
-                    # Extract rule information
-                    rule_id = result.get("ruleId", "Unknown")
-                    message = result.get("message", {}).get("text", "")
-                    level = result.get("level", "warning")
-                    
-                    vuln = {
-                        "tool": "CodeQL",
-                        "type": "SAST",
-                        "title": rule_id,
-                        "severity": self._map_codeql_level(level),
-                        "description": message,
-                        "file": artifact_location.get("uri", ""),
-                        "line": region.get("startLine", 0),
-                        "code_snippet": region.get("snippet", {}).get("text", ""),
-                        "cwe": self._extract_cwe_from_codeql(result),
-                        "owasp": self._map_to_owasp(rule_id),
-                        "recommendation": self._get_codeql_recommendation(result)
-                    }
-                    self.vulnerabilities.append(vuln)
-                    
-            logger.info(f"Parsed {len([v for v in self.vulnerabilities if v['tool'] == 'CodeQL'])} CodeQL findings")
+                vuln = {
+                    "tool": "CodeQL",
+                    "type": "SAST",
+                    "title": rule_id,
+                    "severity": self._map_codeql_level(level),
+                    "description": message,
+                    "file": artifact_location.get("uri", ""),
+                    "line": region.get("startLine", 0),
+                    "code_snippet": (region.get("snippet") or {}).get("text", ""),
+                    "cwe": self._extract_cwe_from_codeql(result),
+                    "owasp": self._map_to_owasp(rule_id),
+                    "recommendation": self._get_codeql_recommendation(result)
+                }
+                if self._add_vulnerability(vuln):
+                    added += 1
+                
+            logger.info(f"Parsed {added} CodeQL findings")
             
         except Exception as e:
-            logger.error(f"Error parsing CodeQL SARIF: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error parsing CodeQL SARIF: {e}")
 
-    def _map_codeql_level(self, level: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _map_codeql_level(level: str) -> str:
         """Map CodeQL severity levels to standard levels"""
         mapping = {
             "error": "HIGH",
@@ -139,8 +293,7 @@ class VulnerabilityParser:
         for tag in tags:
             if "cwe" in tag.lower():
                 # Extract CWE number using regex
-                import re
-                match = re.search(r'cwe-?(\d+)', tag, re.IGNORECASE)
+                match = self._CWE_TAG_RE.search(tag)
                 if match:
                     return f"CWE-{match.group(1)}"
         
@@ -151,8 +304,7 @@ class VulnerabilityParser:
             rule_tags = rule_properties.get("tags", [])
             for tag in rule_tags:
                 if "cwe" in tag.lower():
-                    import re
-                    match = re.search(r'cwe-?(\d+)', tag, re.IGNORECASE)
+                    match = self._CWE_TAG_RE.search(tag)
                     if match:
                         return f"CWE-{match.group(1)}"
         
@@ -171,10 +323,7 @@ class VulnerabilityParser:
         
     def _parse_semgrep(self, file_path: Path):
         """Parse Semgrep SAST report"""
-        with open(file_path) as f:
-            data = json.load(f)
-            
-        for result in data.get("results", []):
+        for result in iter_json_items(file_path, "results.item"):
             vuln = {
                 "tool": "Semgrep",
                 "type": "SAST",
@@ -188,12 +337,11 @@ class VulnerabilityParser:
                 "owasp": self._map_to_owasp(result.get("check_id", "")),
                 "recommendation": result.get("extra", {}).get("fix", "Review and remediate")
             }
-            self.vulnerabilities.append(vuln)
+            self._add_vulnerability(vuln)
             
     def _parse_nodejsscan(self, file_path: Path):
         """Parse NodeJsScan SAST report"""
-        with open(file_path) as f:
-            data = json.load(f)
+        data = load_json(file_path)
             
         for category, findings in data.get("sec_issues", {}).items():
             for finding in findings:
@@ -210,12 +358,11 @@ class VulnerabilityParser:
                     "owasp": self._map_to_owasp(category),
                     "recommendation": finding.get("solution", "")
                 }
-                self.vulnerabilities.append(vuln)
+                self._add_vulnerability(vuln)
                 
     def _parse_bandit(self, file_path: Path):
         """Parse Bandit SAST report"""
-        with open(file_path) as f:
-            data = json.load(f)
+        data = load_json(file_path)
             
         for result in data.get("results", []):
             vuln = {
@@ -231,12 +378,11 @@ class VulnerabilityParser:
                 "owasp": self._map_to_owasp(result.get("test_name", "")),
                 "recommendation": "Review security best practices"
             }
-            self.vulnerabilities.append(vuln)
+            self._add_vulnerability(vuln)
             
     def _parse_npm_audit(self, file_path: Path):
         """Parse npm audit SCA report"""
-        with open(file_path) as f:
-            data = json.load(f)
+        data = load_json(file_path)
             
         for vuln_id, vuln_data in data.get("vulnerabilities", {}).items():
             vuln = {
@@ -252,15 +398,20 @@ class VulnerabilityParser:
                 "owasp": "A06:2021 - Vulnerable Components",
                 "recommendation": f"Update to version {vuln_data.get('fixAvailable', {}).get('version', 'latest')}"
             }
-            self.vulnerabilities.append(vuln)
+            self._add_vulnerability(vuln)
             
     def _parse_snyk(self, file_path: Path):
         """Parse Snyk SCA report"""
-        with open(file_path) as f:
-            data = json.load(f)
-        
         # Handle both single project (dict) and multi-project (list) formats
-        projects = data if isinstance(data, list) else [data]
+        if json_root_is_list(file_path):
+            projects = iter_json_items(file_path, "item")
+        else:
+            # snyk test --json: stream the findings and read the project name
+            # in a separate pass instead of building the whole document
+            projects = [{
+                "projectName": next(iter_json_items(file_path, "projectName"), "unknown"),
+                "vulnerabilities": iter_json_items(file_path, "vulnerabilities.item"),
+            }]
         
         for project in projects:
             project_name = project.get("projectName", "unknown")
@@ -270,6 +421,7 @@ class VulnerabilityParser:
                 vulnerability = {
                     "tool": "Snyk",
                     "type": "SCA",
+                    "id": vuln.get("id", ""),
                     "title": vuln.get("title", vuln.get("id", "")),
                     "severity": vuln.get("severity", "medium").upper(),
                     "description": vuln.get("description", "")[:200] if vuln.get("description") else "",
@@ -282,49 +434,46 @@ class VulnerabilityParser:
                     "recommendation": f"Upgrade to {', '.join(vuln.get('fixedIn', ['latest']))}" if vuln.get('fixedIn') else "Review Snyk recommendations",
                     "project": project_name
                 }
-                self.vulnerabilities.append(vulnerability)
+                self._add_vulnerability(vulnerability)
             
     def _parse_zap_json(self, file_path: Path):
         """Parse OWASP ZAP JSON report"""
-        with open(file_path) as f:
-            data = json.load(f)
+        for alert in iter_json_items(file_path, "site.item.alerts.item"):
+            vuln = {
+                "tool": "OWASP ZAP",
+                "type": "DAST",
+                "title": alert.get("name", "Unknown"),
+                "severity": self._map_zap_risk(alert.get("riskcode", "0")),
+                "description": alert.get("desc", ""),
+                "url": alert.get("instances", [{}])[0].get("uri", ""),
+                "method": alert.get("instances", [{}])[0].get("method", ""),
+                "param": alert.get("instances", [{}])[0].get("param", ""),
+                "cwe": f"CWE-{alert.get('cweid', 'Unknown')}",
+                "owasp": self._map_to_owasp(alert.get("name", "")),
+                "recommendation": alert.get("solution", "")
+            }
+            self._add_vulnerability(vuln)
             
-        for site in data.get("site", []):
-            for alert in site.get("alerts", []):
-                vuln = {
-                    "tool": "OWASP ZAP",
-                    "type": "DAST",
-                    "title": alert.get("name", "Unknown"),
-                    "severity": self._map_zap_risk(alert.get("riskcode", "0")),
-                    "description": alert.get("desc", ""),
-                    "url": alert.get("instances", [{}])[0].get("uri", ""),
-                    "method": alert.get("instances", [{}])[0].get("method", ""),
-                    "param": alert.get("instances", [{}])[0].get("param", ""),
-                    "cwe": f"CWE-{alert.get('cweid', 'Unknown')}",
-                    "owasp": self._map_to_owasp(alert.get("name", "")),
-                    "recommendation": alert.get("solution", "")
-                }
-                self.vulnerabilities.append(vuln)
-                
     def _parse_zap_xml(self, file_path: Path):
         """Parse OWASP ZAP XML report"""
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        for site in root.findall(".//site"):
-            for alert in site.findall(".//alertitem"):
-                vuln = {
-                    "tool": "OWASP ZAP",
-                    "type": "DAST",
-                    "title": alert.find("name").text if alert.find("name") is not None else "Unknown",
-                    "severity": self._map_zap_risk(alert.find("riskcode").text if alert.find("riskcode") is not None else "0"),
-                    "description": alert.find("desc").text if alert.find("desc") is not None else "",
-                    "url": alert.find("uri").text if alert.find("uri") is not None else "",
-                    "cwe": f"CWE-{alert.find('cweid').text}" if alert.find("cweid") is not None else "CWE-Unknown",
-                    "owasp": self._map_to_owasp(alert.find("name").text if alert.find("name") is not None else ""),
-                    "recommendation": alert.find("solution").text if alert.find("solution") is not None else ""
-                }
-                self.vulnerabilities.append(vuln)
+        # The site name keeps the same alert on two sites distinct
+        for site, alert in iter_xml_elements(file_path, "alertitem", context_tag="site"):
+            name = alert.findtext("name")
+            cweid = alert.findtext("cweid")
+            vuln = {
+                "tool": "OWASP ZAP",
+                "type": "DAST",
+                "title": name if name is not None else "Unknown",
+                "severity": self._map_zap_risk(alert.findtext("riskcode", "0")),
+                "description": alert.findtext("desc", ""),
+                # Current ZAP versions keep the uri under <instances>
+                "url": alert.findtext("uri") or alert.findtext("instances/instance/uri", ""),
+                "site": site.get("name", ""),
+                "cwe": f"CWE-{cweid}" if cweid is not None else "CWE-Unknown",
+                "owasp": self._map_to_owasp(name or ""),
+                "recommendation": alert.findtext("solution", "")
+            }
+            self._add_vulnerability(vuln)
                 
     def _map_zap_risk(self, risk_code: str) -> str:
         """Map ZAP risk codes to severity levels"""
@@ -336,82 +485,74 @@ class VulnerabilityParser:
         }
         return mapping.get(str(risk_code), "MEDIUM")
         
-    def _extract_cwe(self, check_id: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _extract_cwe(check_id: str) -> str:
         """Extract CWE from check ID or map common patterns"""
-        import re
-        match = re.search(r'CWE-(\d+)', check_id, re.IGNORECASE)
+        match = VulnerabilityParser._CWE_ID_RE.search(check_id)
         if match:
             return f"CWE-{match.group(1)}"
         return "CWE-Unknown"
         
-    def _map_to_owasp(self, vulnerability_type: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _map_to_owasp(vulnerability_type: str) -> str:
         """Map vulnerability to OWASP Top 10 2021"""
-        owasp_mapping = {
-            "sql": "A03:2021 - Injection",
-            "injection": "A03:2021 - Injection",
-            "xss": "A03:2021 - Injection",
-            "authentication": "A07:2021 - Identification and Authentication Failures",
-            "session": "A07:2021 - Identification and Authentication Failures",
-            "access": "A01:2021 - Broken Access Control",
-            "authorization": "A01:2021 - Broken Access Control",
-            "crypto": "A02:2021 - Cryptographic Failures",
-            "sensitive": "A02:2021 - Cryptographic Failures",
-            "xxe": "A05:2021 - Security Misconfiguration",
-            "deserialization": "A08:2021 - Software and Data Integrity Failures",
-            "component": "A06:2021 - Vulnerable and Outdated Components",
-            "logging": "A09:2021 - Security Logging and Monitoring Failures",
-            "ssrf": "A10:2021 - Server-Side Request Forgery"
-        }
-        
-        vulnerability_lower = vulnerability_type.lower()
-        for key, value in owasp_mapping.items():
-            if key in vulnerability_lower:
-                return value
+        # One regex scan finds every keyword; the highest-priority one decides
+        cls = VulnerabilityParser
+        matches = cls._OWASP_RE.findall(vulnerability_type.lower())
+        if matches:
+            return cls.OWASP_MAPPING[min(matches, key=cls._OWASP_PRIORITY.__getitem__)]
                 
         return "A04:2021 - Insecure Design"
         
     def save_results(self):
         """Save parsed vulnerabilities to JSON"""
+        if self.output_file is None:
+            raise ValueError("No output file configured for this parser")
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
         
+        by_severity, by_type, by_tool = self._count_all()
         output_data = {
             "metadata": {
                 "total_vulnerabilities": len(self.vulnerabilities),
-                "by_severity": self._count_by_severity(),
-                "by_type": self._count_by_type(),
-                "by_tool": self._count_by_tool()
+                "by_severity": by_severity,
+                "by_type": by_type,
+                "by_tool": by_tool
             },
             "vulnerabilities": self.vulnerabilities
         }
         
-        with open(self.output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        with open(self.output_file, 'wb') as f:
+            if ORJSON_AVAILABLE:
+                f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                f.write(json.dumps(output_data, indent=2).encode("utf-8"))
             
         logger.info(f"Results saved to {self.output_file}")
         
-    def _count_by_severity(self) -> Dict[str, int]:
-        """Count vulnerabilities by severity"""
-        counts = {}
+    def _count_all(self) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+        """Count vulnerabilities by severity, type (SAST/SCA/DAST) and tool in one pass"""
+        by_severity = Counter()
+        by_type = Counter()
+        by_tool = Counter()
         for vuln in self.vulnerabilities:
-            severity = vuln.get("severity", "UNKNOWN")
-            counts[severity] = counts.get(severity, 0) + 1
-        return counts
-        
-    def _count_by_type(self) -> Dict[str, int]:
-        """Count vulnerabilities by type (SAST/SCA/DAST)"""
-        counts = {}
-        for vuln in self.vulnerabilities:
-            vuln_type = vuln.get("type", "UNKNOWN")
-            counts[vuln_type] = counts.get(vuln_type, 0) + 1
-        return counts
-        
-    def _count_by_tool(self) -> Dict[str, int]:
-        """Count vulnerabilities by scanning tool"""
-        counts = {}
-        for vuln in self.vulnerabilities:
-            tool = vuln.get("tool", "UNKNOWN")
-            counts[tool] = counts.get(tool, 0) + 1
-        return counts
+            by_severity[vuln.get("severity", "UNKNOWN")] += 1
+            by_type[vuln.get("type", "UNKNOWN")] += 1
+            by_tool[vuln.get("tool", "UNKNOWN")] += 1
+        return dict(by_severity), dict(by_type), dict(by_tool)
+
+
+def _parse_one(job: Tuple[str, Path]) -> List[Dict[str, Any]]:
+    """Run one parser method on one report file and return its findings"""
+    method_name, report_file = job
+    # Worker parsers only collect findings; they never save results
+    parser = VulnerabilityParser(report_file.parent)
+    try:
+        getattr(parser, method_name)(report_file)
+    except Exception as e:
+        logger.error(f"Error parsing {report_file.name}: {e}")
+    return parser.vulnerabilities
 
 
 def main():
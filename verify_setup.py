@@ -8,8 +8,43 @@ Windows-friendly version - pauses before closing
 import sys
 import subprocess
 import os
+import re
+import json
+import shutil
+import sysconfig
+import argparse
 from pathlib import Path
-import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs every "<tool> --version" probe in one shell process; each section is
+# framed by "==tool==" and "==rc N==" so the output can be split per tool
+BATCH_PROBE_SCRIPT = (
+    'for t in "$@"; do '
+    'printf "==%s==\\n" "$t"; '
+    '"$t" --version 2>/dev/null; '
+    'printf "\\n==rc %s==\\n" "$?"; '
+    'done'
+)
+BATCH_PROBE_RE = re.compile(r'^==(.+?)==\n(.*?)\n==rc (\d+)==$', re.DOTALL | re.MULTILINE)
+BATCH_PROBE_TIMEOUT = 15
+
+# Threads for running the independent checks concurrently
+MAX_WORKERS = 8
+
+# Probe results are reused until the tool binary or Python environment changes
+CACHE_FILE = Path.home() / '.cache' / 'ai-devsecops' / 'verify.json'
+
+# Python distributions the pipeline needs
+REQUIRED_PACKAGES = (
+    'openai', 'anthropic', 'nltk', 'rouge-score',
+    'matplotlib', 'pandas', 'requests',
+)
+
+# Project directories expected at the repository root
+REQUIRED_DIRS = (
+    'pipeline', 'scanners', 'parsers', 'llm-policy-generator',
+    'evaluation', 'reference-policies', 'results', 'docs',
+)
 
 class Colors:
     GREEN = '\033[92m'
@@ -19,124 +54,300 @@ class Colors:
     END = '\033[0m'
     BOLD = '\033[1m'
 
+def colors_enabled():
+    """Decide whether to emit ANSI colors (NO_COLOR wins over FORCE_COLOR)"""
+    if os.environ.get('NO_COLOR'):
+        return False
+    if os.environ.get('FORCE_COLOR'):
+        return True
+    return sys.stdout.isatty()
+
+# Piped output and CI logs get plain text
+if not colors_enabled():
+    for _name in ('GREEN', 'RED', 'YELLOW', 'BLUE', 'END', 'BOLD'):
+        setattr(Colors, _name, '')
+
+# Output lines are queued and written to stdout once per section
+_out = []
+
+def emit(text=''):
+    """Queue a line of output"""
+    _out.append(text)
+
+def flush_output():
+    """Write all queued output lines in one call"""
+    if _out:
+        sys.stdout.write('\n'.join(_out) + '\n')
+        sys.stdout.flush()
+        _out.clear()
+
 def print_header(text):
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text:^60}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+    emit(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    emit(f"{Colors.BOLD}{Colors.BLUE}{text:^60}{Colors.END}")
+    emit(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
 
 def check_mark(passed):
     return f"{Colors.GREEN}✓{Colors.END}" if passed else f"{Colors.RED}✗{Colors.END}"
 
-def check_python_version():
+def check_python_version(emit=emit):
     """Check Python version"""
     version = sys.version_info
     passed = version.major == 3 and version.minor >= 9
     status = check_mark(passed)
-    print(f"{status} Python version: {version.major}.{version.minor}.{version.micro}")
+    emit(f"{status} Python version: {version.major}.{version.minor}.{version.micro}")
     if not passed:
-        print(f"   {Colors.YELLOW}⚠ Python 3.9+ required. You have {version.major}.{version.minor}{Colors.END}")
+        emit(f"   {Colors.YELLOW}⚠ Python 3.9+ required. You have {version.major}.{version.minor}{Colors.END}")
     return passed
 
-def check_command(command, name):
-    """Check if a command exists"""
+def report_command(name, passed, version, emit=emit):
+    """Print the result of a command probe"""
+    status = check_mark(passed)
+    if passed:
+        emit(f"{status} {name}: {version}")
+    else:
+        emit(f"{status} {name}: Not found")
+    return passed
+
+def probe_command(command):
+    """Run a single --version probe and return (passed, version_line)"""
     try:
         result = subprocess.run([command, '--version'],
                               capture_output=True, text=True, timeout=5)
-        passed = result.returncode == 0
-        status = check_mark(passed)
-        if passed:
-            version = result.stdout.split('\n')[0]
-            print(f"{status} {name}: {version}")
-        else:
-            print(f"{status} {name}: Not found")
-        return passed
+        return result.returncode == 0, result.stdout.split('\n')[0]
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        print(f"{check_mark(False)} {name}: Not found")
-        return False
+        return False, None
 
-def check_python_package(package_name, import_name=None):
-    """Check if a Python package is installed"""
-    if import_name is None:
-        import_name = package_name
+def check_command(command, name, emit=emit):
+    """Check if a command exists"""
+    return report_command(name, *probe_command(command), emit=emit)
+
+def check_command_presence(command, name, emit=emit):
+    """Check that a command is on PATH without running it"""
+    path = shutil.which(command)
+    passed = path is not None
+    if passed:
+        emit(f"{check_mark(True)} {name}: Found ({path})")
+    else:
+        emit(f"{check_mark(False)} {name}: Not found")
+    return passed
+
+def batch_check_commands(commands):
+    """Run the --version probe of several commands in a single shell process
+
+    Returns {command: (passed, version_line)}. On Windows (where bash may be
+    WSL's and see a different PATH) or without a POSIX shell, each command
+    is probed on its own instead.
+    """
+    shell = None if os.name == 'nt' else shutil.which('sh') or shutil.which('bash')
+    if shell is None:
+        return {command: probe_command(command) for command in commands}
 
     try:
-        module = importlib.import_module(import_name)
-        version = getattr(module, '__version__', 'unknown')
-        print(f"{check_mark(True)} {package_name}: {version}")
-        return True
-    except ImportError:
-        print(f"{check_mark(False)} {package_name}: Not installed")
+        result = subprocess.run([shell, '-c', BATCH_PROBE_SCRIPT, 'probe', *commands],
+                                capture_output=True, text=True, timeout=BATCH_PROBE_TIMEOUT)
+        output = result.stdout
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout or ''
+        if isinstance(output, bytes):
+            output = output.decode(errors='replace')
+
+    results = {command: (False, None) for command in commands}
+    for match in BATCH_PROBE_RE.finditer(output):
+        command, body, returncode = match.groups()
+        if command in results:
+            results[command] = (returncode == '0', body.split('\n')[0])
+    return results
+
+def command_cache_key(command):
+    """Identify a command binary by its resolved path and modification time"""
+    path = shutil.which(command)
+    if path is None:
+        return None
+    try:
+        return [path, os.path.getmtime(path)]
+    except OSError:
+        return None
+
+def package_cache_key():
+    """Identify the Python environment the package results belong to"""
+    site_dirs = sorted({sysconfig.get_paths()['purelib'], sysconfig.get_paths()['platlib']})
+    mtimes = []
+    for site_dir in site_dirs:
+        try:
+            mtimes.append(os.path.getmtime(site_dir))
+        except OSError:
+            mtimes.append(None)
+    return [sys.executable, sys.version, mtimes]
+
+def load_cache():
+    """Load cached probe results, dropping package results from another environment"""
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    cache.setdefault('commands', {})
+    key = package_cache_key()
+    if cache.get('packages', {}).get('key') != key:
+        cache['packages'] = {'key': key, 'entries': {}}
+    return cache
+
+def save_cache(cache):
+    """Atomically rewrite the cache file (best effort)"""
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = CACHE_FILE.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError:
+        pass
+
+def cached_probes(commands, cache=None):
+    """Probe commands, reusing cached results for binaries that have not changed"""
+    if cache is None:
+        return batch_check_commands(commands)
+
+    results = {}
+    keys = {}
+    for command in commands:
+        key = command_cache_key(command)
+        entry = cache['commands'].get(command)
+        if key is None:
+            results[command] = (False, None)
+        elif entry and entry['key'] == key:
+            results[command] = (entry['passed'], entry['version'])
+        else:
+            keys[command] = key
+
+    if keys:
+        for command, (passed, version) in batch_check_commands(list(keys)).items():
+            results[command] = (passed, version)
+            # A probe that timed out has no version line; try it again next run
+            if version is not None:
+                cache['commands'][command] = {'key': keys[command], 'passed': passed, 'version': version}
+    return results
+
+def normalize_package_name(name):
+    """Normalize a distribution name for lookups (PEP 503)"""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def find_package_versions(package_names, cache=None):
+    """Return {package_name: version or None} from one sweep of installed distributions"""
+    # Only found packages are cached: an install into a directory the cache
+    # key does not watch (user site, PYTHONPATH) must show up on the next run
+    entries = cache['packages']['entries'] if cache is not None else None
+    if entries is not None and all(entries.get(name) is not None for name in package_names):
+        return {name: entries[name] for name in package_names}
+
+    # Imported here so the script still starts (and reports the version
+    # problem) on Python < 3.8, where importlib.metadata does not exist
+    import importlib.metadata
+
+    installed = {}
+    for dist in importlib.metadata.distributions():
+        name = dist.metadata['Name']
+        if name:
+            # First match wins, like importlib.metadata.version()
+            installed.setdefault(normalize_package_name(name), dist.version)
+
+    versions = {name: installed.get(normalize_package_name(name)) for name in package_names}
+    if entries is not None:
+        for name, version in versions.items():
+            if version is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = version
+    return versions
+
+def check_python_package(package_name, version, emit=emit):
+    """Report whether a Python package is installed"""
+    if version is None:
+        emit(f"{check_mark(False)} {package_name}: Not installed")
         return False
 
-def check_env_file():
+    emit(f"{check_mark(True)} {package_name}: {version}")
+    return True
+
+def check_env_file(emit=emit):
     """Check if .env file exists and has required keys"""
-    env_file = Path('.env')
+    env_file = '.env'
 
-    if not env_file.exists():
-        print(f"{check_mark(False)} .env file: Not found")
-        print(f"   {Colors.YELLOW}→ Copy .env.example to .env and add your API keys{Colors.END}")
+    if not os.path.isfile(env_file):
+        emit(f"{check_mark(False)} .env file: Not found")
+        emit(f"   {Colors.YELLOW}→ Copy .env.example to .env and add your API keys{Colors.END}")
         return False
 
+    # Each key must carry its own value on its line; stop once all are found
+    has_openai = has_anthropic = has_together = False
     with open(env_file) as f:
-        content = f.read()
-
-    has_openai = 'OPENAI_API_KEY=' in content and 'sk-' in content
-    has_anthropic = 'ANTHROPIC_API_KEY=' in content and 'sk-ant-' in content
-    has_together = 'TOGETHER_API_KEY=' in content
+        for line in f:
+            line = line.lstrip()
+            if line.startswith('OPENAI_API_KEY='):
+                has_openai = has_openai or 'sk-' in line
+            elif line.startswith('ANTHROPIC_API_KEY='):
+                has_anthropic = has_anthropic or 'sk-ant-' in line
+            elif line.startswith('TOGETHER_API_KEY='):
+                has_together = True
+            if has_openai and has_anthropic and has_together:
+                break
 
     api_keys_found = has_openai or has_anthropic or has_together
 
-    print(f"{check_mark(True)} .env file: Found")
-    print(f"   OpenAI key:    {check_mark(has_openai)}")
-    print(f"   Anthropic key: {check_mark(has_anthropic)}")
-    print(f"   Together key:  {check_mark(has_together)}")
+    emit(f"{check_mark(True)} .env file: Found")
+    emit(f"   OpenAI key:    {check_mark(has_openai)}")
+    emit(f"   Anthropic key: {check_mark(has_anthropic)}")
+    emit(f"   Together key:  {check_mark(has_together)}")
 
     if not api_keys_found:
-        print(f"   {Colors.YELLOW}⚠ No API keys configured - add at least one{Colors.END}")
+        emit(f"   {Colors.YELLOW}⚠ No API keys configured - add at least one{Colors.END}")
 
     return api_keys_found
 
-def check_directories():
+def check_directories(emit=emit):
     """Check if required directories exist"""
-    required_dirs = [
-        'pipeline', 'scanners', 'parsers', 'llm-policy-generator',
-        'evaluation', 'reference-policies', 'results', 'docs'
-    ]
+    # One listing of the project root instead of a stat per directory
+    with os.scandir('.') as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
 
     all_exist = True
-    for dir_name in required_dirs:
-        dir_path = Path(dir_name)
-        exists = dir_path.exists()
-        print(f"{check_mark(exists)} Directory: {dir_name}")
+    for dir_name in REQUIRED_DIRS:
+        exists = dir_name in existing
+        emit(f"{check_mark(exists)} Directory: {dir_name}")
         if not exists:
-            print(f"   {Colors.YELLOW}→ Missing directory: {dir_name}{Colors.END}")
+            emit(f"   {Colors.YELLOW}→ Missing directory: {dir_name}{Colors.END}")
         all_exist = all_exist and exists
 
     return all_exist
 
-def check_juice_shop():
+def check_juice_shop(emit=emit):
     """Check if Juice Shop is cloned"""
-    juice_shop_dir = Path('app/juice-shop')
-    exists = juice_shop_dir.exists()
+    # One listing answers both "is it cloned" and "what does it contain"
+    try:
+        with os.scandir('app/juice-shop') as entries:
+            entries = {entry.name: entry for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        entries = None
 
-    if exists:
-        has_package_json = (juice_shop_dir / 'package.json').exists()
-        has_node_modules = (juice_shop_dir / 'node_modules').exists()
+    if entries is not None:
+        has_package_json = 'package.json' in entries and entries['package.json'].is_file()
+        has_node_modules = 'node_modules' in entries and entries['node_modules'].is_dir()
 
-        print(f"{check_mark(True)} Juice Shop: Cloned")
-        print(f"   package.json:  {check_mark(has_package_json)}")
-        print(f"   node_modules:  {check_mark(has_node_modules)}")
+        emit(f"{check_mark(True)} Juice Shop: Cloned")
+        emit(f"   package.json:  {check_mark(has_package_json)}")
+        emit(f"   node_modules:  {check_mark(has_node_modules)}")
 
         if not has_node_modules:
-            print(f"   {Colors.YELLOW}→ Run: cd app/juice-shop && npm install{Colors.END}")
+            emit(f"   {Colors.YELLOW}→ Run: cd app/juice-shop && npm install{Colors.END}")
 
         return has_package_json
     else:
-        print(f"{check_mark(False)} Juice Shop: Not cloned")
-        print(f"   {Colors.YELLOW}→ Run: git clone https://github.com/juice-shop/juice-shop.git app/juice-shop{Colors.END}")
+        emit(f"{check_mark(False)} Juice Shop: Not cloned")
+        emit(f"   {Colors.YELLOW}→ Run: git clone https://github.com/juice-shop/juice-shop.git app/juice-shop{Colors.END}")
         return False
 
-def check_docker():
+def check_docker(emit=emit):
     """Check if Docker is available"""
     try:
         result = subprocess.run(['docker', 'ps'],
@@ -145,55 +356,82 @@ def check_docker():
         status = check_mark(passed)
 
         if passed:
-            print(f"{status} Docker: Running")
+            emit(f"{status} Docker: Running")
         else:
-            print(f"{status} Docker: Not running (optional)")
+            emit(f"{status} Docker: Not running (optional)")
 
         return passed
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        print(f"{check_mark(False)} Docker: Not available (optional)")
+        emit(f"{check_mark(False)} Docker: Not available (optional)")
         return False
 
+def run_buffered(check, *args, **kwargs):
+    """Run a check, collecting its output lines instead of printing them"""
+    lines = []
+    passed = check(*args, emit=lines.append, **kwargs)
+    return passed, lines
+
+def flush_buffered(future):
+    """Queue the buffered output of a finished check and return its result"""
+    passed, lines = future.result()
+    _out.extend(lines)
+    return passed
+
 def print_next_steps(core_ok, config_ok, packages_ok):
     """Print what to do next based on results"""
-    print(f"\n{Colors.BOLD}NEXT STEPS:{Colors.END}")
-    print("=" * 60)
+    emit(f"\n{Colors.BOLD}NEXT STEPS:{Colors.END}")
+    emit("=" * 60)
 
     if core_ok and config_ok and packages_ok:
-        print(f"\n{Colors.GREEN}{Colors.BOLD}✓ Your setup is ready!{Colors.END}\n")
-        print("You can now run the pipeline:")
-        print(f"{Colors.GREEN}  ./run_pipeline.sh{Colors.END}")
-        print("\nOr on Windows:")
-        print(f"{Colors.GREEN}  bash run_pipeline.sh{Colors.END}")
+        emit(f"\n{Colors.GREEN}{Colors.BOLD}✓ Your setup is ready!{Colors.END}\n")
+        emit("You can now run the pipeline:")
+        emit(f"{Colors.GREEN}  ./run_pipeline.sh{Colors.END}")
+        emit("\nOr on Windows:")
+        emit(f"{Colors.GREEN}  bash run_pipeline.sh{Colors.END}")
     else:
-        print(f"\n{Colors.YELLOW}⚠ Please complete these steps:{Colors.END}\n")
+        emit(f"\n{Colors.YELLOW}⚠ Please complete these steps:{Colors.END}\n")
 
         if not core_ok:
-            print(f"{Colors.RED}CRITICAL - Core Requirements:{Colors.END}")
-            print("  1. Install Python 3.9 or higher")
-            print("  2. Install Node.js 18 or higher")
-            print("  3. Install Git")
-            print()
+            emit(f"{Colors.RED}CRITICAL - Core Requirements:{Colors.END}")
+            emit("  1. Install Python 3.9 or higher")
+            emit("  2. Install Node.js 18 or higher")
+            emit("  3. Install Git")
+            emit()
 
         if not packages_ok:
-            print(f"{Colors.YELLOW}Install Python Packages:{Colors.END}")
-            print("  pip install -r requirements.txt")
-            print()
+            emit(f"{Colors.YELLOW}Install Python Packages:{Colors.END}")
+            emit("  pip install -r requirements.txt")
+            emit()
 
         if not config_ok:
-            print(f"{Colors.YELLOW}Complete Configuration:{Colors.END}")
-            print("  1. Copy .env.example to .env")
-            print("  2. Add at least one API key to .env")
-            print("  3. Clone Juice Shop:")
-            print("     git clone https://github.com/juice-shop/juice-shop.git app/juice-shop")
-            print("  4. Install Juice Shop:")
-            print("     cd app/juice-shop && npm install")
-            print()
+            emit(f"{Colors.YELLOW}Complete Configuration:{Colors.END}")
+            emit("  1. Copy .env.example to .env")
+            emit("  2. Add at least one API key to .env")
+            emit("  3. Clone Juice Shop:")
+            emit("     git clone https://github.com/juice-shop/juice-shop.git app/juice-shop")
+            emit("  4. Install Juice Shop:")
+            emit("     cd app/juice-shop && npm install")
+            emit()
 
 def main():
+    parser = argparse.ArgumentParser(description="Verify the AI-DevSecOps project setup")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Re-run every probe instead of reusing results from {CACHE_FILE}"
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop after the core requirements if any of them fail"
+    )
+    args = parser.parse_args()
+
     try:
         print_header("AI-DEVSECOPS PROJECT SETUP VERIFICATION")
 
+        cache = None if args.no_cache else load_cache()
+
         checks = {
             'core': [],
             'tools': [],
@@ -202,49 +440,82 @@ def main():
             'optional': []
         }
 
-        # Core checks
-        print(f"\n{Colors.BOLD}1. Core Requirements{Colors.END}")
-        print("-" * 40)
-        checks['core'].append(check_python_version())
-        checks['core'].append(check_command('node', 'Node.js'))
-        checks['core'].append(check_command('npm', 'npm'))
-        checks['core'].append(check_command('git', 'Git'))
-
-        # Security tools
-        print(f"\n{Colors.BOLD}2. Security Tools{Colors.END}")
-        print("-" * 40)
-        checks['tools'].append(check_command('semgrep', 'Semgrep'))
-        checks['tools'].append(check_command('nodejsscan', 'NodeJsScan'))
-        print(f"   {Colors.BLUE}ℹ These will be installed if missing{Colors.END}")
-
-        # Optional tools
-        print(f"\n{Colors.BOLD}3. Optional Tools{Colors.END}")
-        print("-" * 40)
-        checks['optional'].append(check_docker())
-        checks['optional'].append(check_command('snyk', 'Snyk'))
-
-        # Python packages
-        print(f"\n{Colors.BOLD}4. Python Packages{Colors.END}")
-        print("-" * 40)
-        required_packages = [
-            ('openai', 'openai'),
-            ('anthropic', 'anthropic'),
-            ('nltk', 'nltk'),
-            ('rouge-score', 'rouge_score'),
-            ('matplotlib', 'matplotlib'),
-            ('pandas', 'pandas'),
-            ('requests', 'requests')
-        ]
-
-        for display_name, import_name in required_packages:
-            checks['packages'].append(check_python_package(display_name, import_name))
-
-        # Configuration
-        print(f"\n{Colors.BOLD}5. Configuration{Colors.END}")
-        print("-" * 40)
-        checks['config'].append(check_env_file())
-        checks['config'].append(check_directories())
-        checks['config'].append(check_juice_shop())
+        # The checks only wait on subprocesses and the filesystem, so
+        # start them all at once and print their buffered output in order
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            # Probe the tools whose versions are shown in one process up front
+            probes_future = executor.submit(
+                cached_probes, ['node', 'npm', 'git', 'semgrep'], cache)
+            # Packages cannot be relied on under an unsupported interpreter
+            python_passed, python_lines = run_buffered(check_python_version)
+
+            def submit_remaining_checks():
+                docker_future = executor.submit(run_buffered, check_docker)
+                packages_future = executor.submit(
+                    find_package_versions, REQUIRED_PACKAGES, cache) if python_passed else None
+                config_futures = [
+                    executor.submit(run_buffered, check)
+                    for check in (check_env_file, check_directories, check_juice_shop)
+                ]
+                return docker_future, packages_future, config_futures
+
+            # With --fail-fast nothing else starts before the core checks pass
+            if not args.fail_fast:
+                docker_future, packages_future, config_futures = submit_remaining_checks()
+
+            # Core checks
+            emit(f"\n{Colors.BOLD}1. Core Requirements{Colors.END}")
+            emit("-" * 40)
+            _out.extend(python_lines)
+            checks['core'].append(python_passed)
+            probes = probes_future.result()
+            checks['core'].append(report_command('Node.js', *probes['node']))
+            checks['core'].append(report_command('npm', *probes['npm']))
+            checks['core'].append(report_command('Git', *probes['git']))
+            flush_output()
+
+            if args.fail_fast:
+                if not all(checks['core']):
+                    print_next_steps(False, False, False)
+                    return 1
+                docker_future, packages_future, config_futures = submit_remaining_checks()
+
+            # Security tools
+            emit(f"\n{Colors.BOLD}2. Security Tools{Colors.END}")
+            emit("-" * 40)
+            checks['tools'].append(report_command('Semgrep', *probes['semgrep']))
+            checks['tools'].append(check_command_presence('nodejsscan', 'NodeJsScan'))
+            emit(f"   {Colors.BLUE}ℹ These will be installed if missing{Colors.END}")
+            flush_output()
+
+            # Optional tools
+            emit(f"\n{Colors.BOLD}3. Optional Tools{Colors.END}")
+            emit("-" * 40)
+            checks['optional'].append(flush_buffered(docker_future))
+            checks['optional'].append(check_command_presence('snyk', 'Snyk'))
+            flush_output()
+
+            # Python packages
+            emit(f"\n{Colors.BOLD}4. Python Packages{Colors.END}")
+            emit("-" * 40)
+            if packages_future is not None:
+                versions = packages_future.result()
+                for package_name in REQUIRED_PACKAGES:
+                    checks['packages'].append(check_python_package(package_name, versions[package_name]))
+            else:
+                emit(f"{check_mark(False)} Skipped: Python 3.9+ is required first")
+                checks['packages'].extend([False] * len(REQUIRED_PACKAGES))
+            flush_output()
+
+            # Configuration
+            emit(f"\n{Colors.BOLD}5. Configuration{Colors.END}")
+            emit("-" * 40)
+            for future in config_futures:
+                checks['config'].append(flush_buffered(future))
+            flush_output()
+
+        if cache is not None:
+            save_cache(cache)
 
         # Summary
         print_header("VERIFICATION SUMMARY")
@@ -255,11 +526,11 @@ def main():
         config_passed = sum(checks['config'])
         optional_passed = sum(checks['optional'])
 
-        print(f"Core Requirements:  {core_passed}/{len(checks['core'])} passed")
-        print(f"Security Tools:     {tools_passed}/{len(checks['tools'])} passed")
-        print(f"Python Packages:    {packages_passed}/{len(checks['packages'])} passed")
-        print(f"Configuration:      {config_passed}/{len(checks['config'])} passed")
-        print(f"Optional Tools:     {optional_passed}/{len(checks['optional'])} passed")
+        emit(f"Core Requirements:  {core_passed}/{len(checks['core'])} passed")
+        emit(f"Security Tools:     {tools_passed}/{len(checks['tools'])} passed")
+        emit(f"Python Packages:    {packages_passed}/{len(checks['packages'])} passed")
+        emit(f"Configuration:      {config_passed}/{len(checks['config'])} passed")
+        emit(f"Optional Tools:     {optional_passed}/{len(checks['optional'])} passed")
 
         # Determine overall status
         core_ok = core_passed == len(checks['core'])
@@ -272,12 +543,13 @@ def main():
         return 0 if (core_ok and config_ok and packages_ok) else 1
 
     except Exception as e:
-        print(f"\n{Colors.RED}Error during verification: {e}{Colors.END}")
+        emit(f"\n{Colors.RED}Error during verification: {e}{Colors.END}")
         return 1
 
     finally:
         # PAUSE - Wait for user input before closing
-        print("\n" + "=" * 60)
+        emit("\n" + "=" * 60)
+        flush_output()
         input(f"\n{Colors.BOLD}Press ENTER to exit...{Colors.END}")
 
 if __name__ == "__main__":